@@ -1,25 +1,54 @@
 import numpy as np
 
+AXES = ('roll', 'pitch', 'yaw')
+
 class AttitudeController3D:
     """
     PID controller for 3D attitude (roll, pitch, yaw).
     Each axis has its own PID gains and output limits (radians/sec).
+
+    Gains are held as arrays (kp, ki, kd, limit; one entry per axis) and all
+    axes are computed in one vectorized expression. Attitudes may carry a
+    leading batch dimension: with (M, 3) inputs the integrators and previous
+    errors of M vehicles are updated together.
     """
-    def __init__(self, gains):
+    def __init__(self, gains, n_vehicles=None):
+        """
+        Args:
+            gains: Dict {'roll'|'pitch'|'yaw': (kp, ki, kd, limit)}, or an array
+                of shape (4, 3) (rows kp, ki, kd, limit), or (4, M, 3) for
+                per-vehicle gains.
+            n_vehicles (int or None): Batch size M; None controls one vehicle
+                with (3,) attitudes.
+        """
         self.gains = gains
-        self.integral = np.zeros(3)
-        self.prev_error = np.zeros(3)
+        if isinstance(gains, dict):
+            gains = np.array([gains[axis] for axis in AXES], dtype=float).T
+        self.kp, self.ki, self.kd, self.limit = np.asarray(gains, dtype=float)
+        self.n_vehicles = n_vehicles
+        self.reset()
 
-    def compute(self, att_des, att, dt):
-        u = np.zeros(3)
-        for i, axis in enumerate(['roll', 'pitch', 'yaw']):
-            kp, ki, kd, lim = self.gains[axis]
-            error = att_des[i] - att[i]
-            self.integral[i] += error * dt
-            d_error = (error - self.prev_error[i]) / dt if dt > 0 else 0.0
-            out = kp * error + ki * self.integral[i] + kd * d_error
-            out = np.clip(out, -lim, lim)
-            u[i] = out
-            self.prev_error[i] = error
-        return u
+    def reset(self):
+        shape = (3,) if self.n_vehicles is None else (self.n_vehicles, 3)
+        self.integral = np.zeros(shape)
+        self.prev_error = np.zeros(shape)
 
+    def compute(self, att_des, att, dt, out=None):
+        """
+        Args:
+            att_des (np.array): Desired (roll, pitch, yaw), (3,) or (M, 3).
+            att (np.array): Current attitude, same shape.
+            dt (float): Time step [s].
+            out (np.array or None): Optional preallocated output buffer.
+        Returns:
+            np.array: Rate commands, clipped per axis to +/- limit.
+        """
+        error = np.subtract(att_des, att, dtype=float)
+        self.integral += error * dt
+        u = np.multiply(self.kp, error, out=out)
+        u += self.ki * self.integral
+        if dt > 0:
+            u += self.kd * ((error - self.prev_error) / dt)
+        np.clip(u, -self.limit, self.limit, out=u)
+        self.prev_error = error
+        return u
@@ -0,0 +1,334 @@
+# src/engagement.py
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
+from position_controller import PositionController
+from vehicle import Fleet
+
+# --- Spatial index ---
+_KEY_OFFSET = 1 << 20
+
+def _cell_keys(cells):
+    # Injective int64 key for integer cell coordinates in [-2^20, 2^20)
+    c = cells + _KEY_OFFSET
+    return (c[..., 0] << 42) | (c[..., 1] << 21) | c[..., 2]
+
+def _shell_size(r):
+    # Number of cells at Chebyshev distance exactly r
+    return (2 * r + 1) ** 3 - (2 * r - 1) ** 3 if r > 0 else 1
+
+def _shell(r):
+    # Cell offsets at Chebyshev distance exactly r
+    offsets = np.array(list(itertools.product(range(-r, r + 1), repeat=3)), dtype=np.int64)
+    return offsets[np.abs(offsets).max(axis=1) == r]
+
+class UniformGrid:
+    """
+    Uniform-grid spatial index for k-nearest-neighbour queries.
+
+    Points are bucketed by integer cell and sorted by cell key, so a build
+    is one argsort (cheap enough to redo every step for moving targets).
+    Queries search shells of cells around each query's cell outward and
+    stop once the k-th best distance is provably final (every unsearched
+    cell is at least r * cell_size away), so no N x M distance matrix is
+    ever formed.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+
+    def build(self, points, ids=None):
+        """
+        Index (M, 3) points; `ids` (default 0..M-1) are returned by query().
+        """
+        self.points = np.asarray(points, dtype=float)
+        self.ids = np.arange(len(self.points)) if ids is None else np.asarray(ids)
+        cells = np.floor(self.points / self.cell_size).astype(np.int64)
+        keys = _cell_keys(cells)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys, self.starts, self.counts = np.unique(keys[self.order], return_index=True,
+                                                        return_counts=True)
+        if len(cells):
+            self.cell_lo, self.cell_hi = cells.min(axis=0), cells.max(axis=0)
+        return self
+
+    def _gather(self, qcells, offsets):
+        # (query row, point index) pairs for every point in the offset cells
+        neighbor_keys = _cell_keys(qcells[:, None, :] + offsets[None, :, :])
+        slot = np.minimum(np.searchsorted(self.keys, neighbor_keys), len(self.keys) - 1)
+        found = self.keys[slot] == neighbor_keys
+        starts = np.where(found, self.starts[slot], 0).ravel()
+        counts = np.where(found, self.counts[slot], 0).ravel()
+        total = counts.sum()
+        qrow = np.repeat(np.arange(len(qcells)), counts.reshape(len(qcells), -1).sum(axis=1))
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return qrow, self.order[np.repeat(starts, counts) + within]
+
+    def query(self, queries, k=1):
+        """
+        k nearest indexed points for each query.
+        Args:
+            queries (np.array): (Q, 3) query positions.
+            k (int): Neighbours per query.
+        Returns:
+            (np.array, np.array): (Q, k) distances (ascending) and ids;
+                missing neighbours (fewer than k points) are inf / -1.
+        """
+        queries = np.asarray(queries, dtype=float)
+        Q = len(queries)
+        best_d = np.full((Q, k), np.inf)
+        best_i = np.full((Q, k), -1)
+        if Q == 0 or len(self.points) == 0:
+            return best_d, best_i
+
+        qcells = np.floor(queries / self.cell_size).astype(np.int64)
+        # Shells beyond this radius contain no cells of the point set
+        r_max = np.maximum(np.abs(qcells - self.cell_lo), np.abs(qcells - self.cell_hi)).max(axis=1)
+        # Shells closer than this radius lie entirely outside the point set's bounds
+        r = np.maximum(np.maximum(self.cell_lo - qcells, qcells - self.cell_hi), 0).max(axis=1)
+        M = len(self.points)
+        pending = np.arange(Q)
+        while pending.size:
+            # Advance queries ring by ring; queries sharing a radius are gathered together
+            for radius in np.unique(r[pending]):
+                rows = pending[r[pending] == radius]
+                if _shell_size(radius) <= M:
+                    qrow, pidx = self._gather(qcells[rows], _shell(int(radius)))
+                    dist = np.linalg.norm(queries[rows[qrow]] - self.points[pidx], axis=1)
+                    self._merge(best_d, best_i, rows, qrow, dist, pidx, k)
+                    continue
+                # Far from the points, a shell has more cells than there are points:
+                # check every point directly (in bounded blocks) and finish these queries
+                best_d[rows], best_i[rows] = np.inf, -1
+                for block in np.array_split(rows, max(1, len(rows) * M // 2**20)):
+                    qrow, pidx = np.repeat(np.arange(len(block)), M), np.tile(np.arange(M), len(block))
+                    dist = np.linalg.norm(queries[block[qrow]] - self.points[pidx], axis=1)
+                    self._merge(best_d, best_i, block, qrow, dist, pidx, k)
+                r[rows] = r_max[rows]
+            finished = (best_d[pending, -1] <= r[pending] * self.cell_size) | (r[pending] >= r_max[pending])
+            r[pending] += 1
+            pending = pending[~finished]
+
+        ids = np.where(best_i >= 0, self.ids[np.maximum(best_i, 0)], -1)
+        return best_d, ids
+
+    @staticmethod
+    def _merge(best_d, best_i, rows, qrow, dist, pidx, k):
+        # Keep the k smallest of (current best, new candidates) per row
+        row_ids = np.concatenate([np.repeat(np.arange(len(rows)), k), qrow])
+        all_d = np.concatenate([best_d[rows].ravel(), dist])
+        all_i = np.concatenate([best_i[rows].ravel(), pidx])
+        order = np.argsort(all_d, kind="stable")
+        order = order[np.argsort(row_ids[order], kind="stable")]
+        row_sorted = row_ids[order]
+        rank = np.arange(len(order)) - np.searchsorted(row_sorted, row_sorted)
+        keep = order[rank < k]
+        best_d[rows] = all_d[keep].reshape(len(rows), k)
+        best_i[rows] = all_i[keep].reshape(len(rows), k)
+
+# --- Assignment ---
+def auction_assign(candidates, benefit, n_objects, eps=1e-2, max_rounds=100000):
+    """
+    Sparse Jacobi auction (Bertsekas): every unassigned bidder bids for
+    its best candidate object at once, each object goes to its highest
+    bid, and prices rise until no bidder wants to switch. The result is
+    within n * eps of the maximum-benefit one-to-one assignment over the
+    candidate lists.
+
+    Bidders whose best net value falls below the worst benefit minus one
+    drop out unassigned, so the auction also terminates when there are
+    more bidders than objects.
+
+    Args:
+        candidates (np.array): (n, k) object ids per bidder (-1 = none).
+        benefit (np.array): (n, k) benefit of each candidate.
+        n_objects (int): Number of objects (ids are 0..n_objects-1).
+        eps (float): Minimum bid increment.
+        max_rounds (int): Safety cap on bidding rounds.
+    Returns:
+        np.array: (n,) assigned object per bidder, -1 if unassigned.
+    """
+    n, k = candidates.shape
+    valid = candidates >= 0
+    assigned = np.full(n, -1)
+    owner = np.full(n_objects, -1)
+    price = np.zeros(n_objects)
+    if not valid.any():
+        return assigned
+    floor = benefit[valid].min() - 1.0
+    safe_candidates = np.where(valid, candidates, 0)
+    bidders = np.flatnonzero(valid.any(axis=1))
+
+    for _ in range(max_rounds):
+        if bidders.size == 0:
+            break
+        values = np.where(valid[bidders], benefit[bidders] - price[safe_candidates[bidders]], -np.inf)
+        if k > 1:
+            top2 = -np.partition(-values, 1, axis=1)[:, :2]
+            v1, v2 = top2[:, 0], top2[:, 1]
+        else:
+            v1, v2 = values[:, 0], np.full(len(bidders), -np.inf)
+        v2 = np.maximum(v2, floor)
+        stay = v1 >= floor
+        best = safe_candidates[bidders, np.argmax(values, axis=1)]
+        bidders, best, bid = bidders[stay], best[stay], (price[best] + v1 - v2 + eps)[stay]
+        if bidders.size == 0:
+            break
+
+        # Highest bid per object wins
+        order = np.lexsort((-bid, best))
+        first = np.r_[True, best[order][1:] != best[order][:-1]]
+        win = order[first]
+        objects, winners = best[win], bidders[win]
+        outbid = owner[objects]
+        assigned[outbid[outbid >= 0]] = -1
+        owner[objects] = winners
+        assigned[winners] = objects
+        price[objects] = bid[win]
+        lost = np.ones(len(bidders), dtype=bool)
+        lost[win] = False
+        bidders = np.concatenate([bidders[lost], outbid[outbid >= 0]])
+    return assigned
+
+# --- Engagement ---
+def run_engagement(pursuer_pos, targets, guidance, pursuer_vel=None, dt=0.05, N=400, capture_radius=0.5,
+                   max_acc=np.inf, max_vel=np.inf, reassign_every=20, k=8, cell_size=None, eps=1e-2):
+    """
+    Many pursuers against many targets.
+
+    Every `reassign_every` steps the live targets are indexed in a
+    UniformGrid, each active pursuer's k nearest targets become its
+    candidate list, and an auction picks a one-to-one assignment that
+    minimises total range. Pursuers left over (more pursuers than targets,
+    or all candidates taken) chase their nearest live target, as do
+    pursuers whose target is killed between auctions. Guidance runs
+    through the batch kernels on all active pursuers at once.
+
+    A pursuer within capture_radius of its live assigned target kills it
+    and is expended.
+
+    Args:
+        pursuer_pos (np.array): (n, 3) initial pursuer positions.
+        targets: Object with positions(t)/velocities(t) returning (M, 3)
+            for scalar t (e.g. target.HelicalSwarm).
+        guidance: PurePursuitGuidance, ProportionalNavigationGuidance or
+            PositionController.
+        pursuer_vel (np.array or None): (n, 3) initial velocities.
+        dt (float): Time step [s].
+        N (int): Number of steps.
+        capture_radius (float): Kill distance [m].
+        max_acc, max_vel (float): Fleet limits (per axis).
+        reassign_every (int): Steps between periodic reassignments.
+        k (int): Candidate targets per pursuer in the auction.
+        cell_size (float or None): Grid cell size (default: from target spacing).
+        eps (float): Auction bid increment [m].
+    Returns:
+        (pd.DataFrame, dict): One row per (pursuer, target) pair that was
+            ever assigned, with miss_distance (closest range while assigned),
+            steps assigned and killed; and a summary with kill_rate,
+            targets_killed, pursuers_expended and reassignments.
+    """
+    fleet = Fleet(len(pursuer_pos), pos=pursuer_pos, vel=pursuer_vel, max_acc=max_acc, max_vel=max_vel)
+    n = len(fleet)
+    M = len(targets.positions(0.0))
+    target_alive = np.ones(M, dtype=bool)
+    kill_time = np.full(M, np.nan)
+    assignment = np.full(n, -1)
+    pair_min = np.full(n, np.inf)
+    pair_start = np.zeros(n, dtype=int)
+    segments = []
+    reassignments = 0
+    acc = np.zeros((n, 3))
+    steps_run = N
+
+    def close_segments(rows, step, killed=False):
+        rows = rows[assignment[rows] >= 0]
+        if rows.size:
+            segments.append(pd.DataFrame({"pursuer": rows, "target": assignment[rows],
+                                          "miss_distance": pair_min[rows],
+                                          "steps": step - pair_start[rows], "killed": killed}))
+
+    for i in range(N):
+        t = i * dt
+        target_pos = targets.positions(t)
+        target_vel = targets.velocities(t)
+        live = np.flatnonzero(target_alive)
+        if live.size == 0:
+            steps_run = i
+            break
+
+        active = fleet.active
+        orphaned = np.flatnonzero(active & (assignment >= 0) & ~target_alive[np.maximum(assignment, 0)])
+        periodic = i % reassign_every == 0
+        if periodic or orphaned.size:
+            size = cell_size or _default_cell_size(target_pos[live])
+            grid = UniformGrid(size).build(target_pos[live], ids=live)
+            new = assignment.copy()
+            if periodic:
+                rows = np.flatnonzero(active)
+                dist, cand = grid.query(fleet.pos[rows], k=min(k, live.size))
+                new[rows] = auction_assign(cand, -dist, M, eps=eps)
+                leftover = new[rows] < 0
+                new[rows[leftover]] = cand[leftover, 0]
+                reassignments += 1
+            else:
+                # Between auctions, pursuers whose target was killed take the nearest live one
+                new[orphaned] = grid.query(fleet.pos[orphaned], k=1)[1][:, 0]
+            changed = np.flatnonzero(new != assignment)
+            close_segments(changed, i)
+            assignment[changed] = new[changed]
+            pair_min[changed] = np.inf
+            pair_start[changed] = i
+
+        rows = np.flatnonzero(fleet.active & (assignment >= 0))
+        acc[:] = 0.0
+        tp = target_pos[assignment[rows]]
+        if isinstance(guidance, PurePursuitGuidance):
+            acc[rows] = guidance.compute_command_batch(fleet.pos[rows], tp)
+        elif isinstance(guidance, ProportionalNavigationGuidance):
+            acc[rows] = guidance.compute_command_batch(fleet.pos[rows], fleet.vel[rows], tp,
+                                                       target_vel[assignment[rows]])
+        elif isinstance(guidance, PositionController):
+            acc[rows] = guidance.compute_acceleration_batch(fleet.pos[rows], fleet.vel[rows], tp)
+        else:
+            raise ValueError("Unknown guidance type")
+        fleet.integrate(acc, dt)
+
+        # Range after the step to the assigned target, as in the Monte Carlo metrics
+        dist = np.linalg.norm(fleet.pos[rows] - tp, axis=1)
+        np.minimum(pair_min[rows], dist, out=dist)
+        pair_min[rows] = dist
+        hit = rows[(dist < capture_radius) & target_alive[assignment[rows]]]
+        if hit.size:
+            # One kill per target; the first pursuer in range is credited and expended
+            killed_targets, first = np.unique(assignment[hit], return_index=True)
+            killers = hit[first]
+            target_alive[killed_targets] = False
+            kill_time[killed_targets] = (i + 1) * dt  # Time at the end of the step
+            fleet.captured[killers] = True
+            close_segments(killers, i + 1, killed=True)
+            assignment[killers] = -1
+
+    close_segments(np.arange(n), steps_run)
+    pairs = pd.concat(segments, ignore_index=True) if segments else pd.DataFrame(
+        columns=["pursuer", "target", "miss_distance", "steps", "killed"])
+    pairs = (pairs.groupby(["pursuer", "target"], as_index=False)
+             .agg(miss_distance=("miss_distance", "min"), steps=("steps", "sum"), killed=("killed", "any")))
+    summary = {
+        "pursuers": n,
+        "targets": M,
+        "targets_killed": int((~target_alive).sum()),
+        "kill_rate": float((~target_alive).mean()),
+        "pursuers_expended": int(fleet.captured.sum()),
+        "mean_kill_time": float(np.nanmean(kill_time)) if (~target_alive).any() else np.nan,
+        "reassignments": reassignments,
+    }
+    return pairs, summary
+
+def _default_cell_size(points):
+    # About two targets per occupied cell for a uniform spread
+    extent = np.ptp(points, axis=0).max() if len(points) > 1 else 1.0
+    return max(extent / max(len(points) / 2, 1) ** (1 / 3), 1e-3)
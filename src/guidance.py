@@ -1,5 +1,7 @@
 # src/guidance.py
 
+import math
+
 import numpy as np
 
 class PurePursuitGuidance:
@@ -10,15 +12,41 @@ class PurePursuitGuidance:
     def __init__(self, gain=1.0):
         self.gain = gain
 
-    def compute_command(self, pursuer_pos, target_pos):
+    def compute_command(self, pursuer_pos, target_pos, out=None):
+        """
+        Args:
+            out (np.array or None): Optional preallocated output buffer; the
+                command is written in place without temporaries.
+        """
         # Direction vector from pursuer to target
-        vec = np.array(target_pos) - np.array(pursuer_pos)
-        dist = np.linalg.norm(vec)
+        vec = np.subtract(target_pos, pursuer_pos, out=out, dtype=float)
+        dist = math.sqrt(vec @ vec)
         if dist < 1e-6:
-            return np.zeros_like(vec)
-        direction = vec / dist
+            vec.fill(0.0)
+            return vec
         # Output is desired velocity vector (can scale by gain)
-        return self.gain * direction
+        vec *= self.gain / dist
+        return vec
+
+    def compute_command_batch(self, pursuer_pos, target_pos, out=None):
+        """
+        Batch version of compute_command for many pursuer/target pairs.
+        Args:
+            pursuer_pos (np.array): (N, 3) pursuer positions.
+            target_pos (np.array): (N, 3) target positions, or a single (3,)
+                target shared by all rows.
+            out (np.array or None): Optional preallocated (N, 3) output buffer.
+        Returns:
+            np.array: (N, 3) commands; rows closer than 1e-6 get zeros.
+        """
+        vec = np.subtract(target_pos, pursuer_pos, out=out, dtype=float)
+        dist = np.linalg.norm(vec, axis=1)
+        close = dist < 1e-6
+        dist[close] = 1.0
+        vec /= dist[:, None]
+        vec[close] = 0.0
+        vec *= self.gain
+        return vec
 
 class ProportionalNavigationGuidance:
     """
@@ -28,15 +56,99 @@ class ProportionalNavigationGuidance:
     def __init__(self, nav_constant=3.0):
         self.N = nav_constant
 
-    def compute_command(self, pursuer_pos, pursuer_vel, target_pos, target_vel):
-        r_rel = np.array(target_pos) - np.array(pursuer_pos)
-        v_rel = np.array(target_vel) - np.array(pursuer_vel)
-        r_norm = np.linalg.norm(r_rel)
+    def compute_command(self, pursuer_pos, pursuer_vel, target_pos, target_vel, out=None):
+        """
+        Args:
+            out (np.array or None): Optional preallocated (3,) output buffer;
+                with it, the command is computed in reused scratch space
+                without temporaries.
+        2D states are treated as lying in the z = 0 plane and give a 2D
+        command (without the allocation-free path).
+        """
+        if len(pursuer_pos) == 2:
+            planar = [np.append(np.asarray(v, dtype=float), 0.0)
+                      for v in (pursuer_pos, pursuer_vel, target_pos, target_vel)]
+            cmd = self.compute_command(*planar)[:2]
+            if out is None:
+                return cmd
+            out[:] = cmd
+            return out
+        if out is None:
+            out = np.empty(3)
+        scratch = getattr(self, "_scratch", None)
+        if scratch is None:
+            scratch = self._scratch = np.empty((3, 3))
+        r_rel, v_rel, los_rate = scratch
+        np.subtract(target_pos, pursuer_pos, out=r_rel)
+        np.subtract(target_vel, pursuer_vel, out=v_rel)
+        r_sq = r_rel @ r_rel
+
+        if r_sq < 1e-12:
+            out.fill(0.0)
+            return out
+
+        _cross(r_rel, v_rel, los_rate)
+        los_rate *= 1.0 / (r_sq + 1e-6)
+        _cross(los_rate, pursuer_vel, out)
+        out *= self.N
+        return out
+
+    def compute_command_batch(self, pursuer_pos, pursuer_vel, target_pos, target_vel, out=None):
+        """
+        Batch version of compute_command for many pursuer/target pairs (3D only).
+        Args:
+            pursuer_pos (np.array): (N, 3) pursuer positions.
+            pursuer_vel (np.array): (N, 3) pursuer velocities.
+            target_pos (np.array): (N, 3) target positions, or a single (3,) target.
+            target_vel (np.array): (N, 3) target velocities, or a single (3,) velocity.
+            out (np.array or None): Optional preallocated (N, 3) output buffer;
+                with it, intermediates live in reused scratch space (grown to
+                the largest N seen), so repeated calls allocate no arrays.
+        Returns:
+            np.array: (N, 3) acceleration commands; rows closer than 1e-6 get zeros.
+        """
+        n = len(pursuer_pos)
+        if out is None:
+            out = np.empty((n, 3))
+        scratch = getattr(self, "_batch_scratch", None)
+        if scratch is None or scratch[0].shape[1] < n:
+            scratch = self._batch_scratch = (np.empty((3, n, 3)), np.empty((2, n)))
+        r_rel, v_rel, los_rate = scratch[0][:, :n]
+        r_sq, tmp = scratch[1][:, :n]
+
+        np.subtract(target_pos, pursuer_pos, out=r_rel)
+        np.subtract(target_vel, pursuer_vel, out=v_rel)
+        np.einsum("ij,ij->i", r_rel, r_rel, out=r_sq)
+        _cross_rows(r_rel, v_rel, los_rate, tmp)
+        np.add(r_sq, 1e-6, out=tmp)
+        np.reciprocal(tmp, out=tmp)
+        _scale_rows(los_rate, tmp)
+        _cross_rows(los_rate, pursuer_vel, out, tmp)
+        # Rows closer than 1e-6 get zeros (a 0/1 weight, so no index arrays are built)
+        np.greater_equal(r_sq, 1e-12, out=tmp)
+        tmp *= self.N
+        return _scale_rows(out, tmp)
+
+def _cross(a, b, out):
+    # 3-vector cross product into `out` (np.cross allocates several temporaries);
+    # callers embed 2D vectors in 3D first
+    a0, a1, a2 = a
+    b0, b1, b2 = b
+    out[0] = a1 * b2 - a2 * b1
+    out[1] = a2 * b0 - a0 * b2
+    out[2] = a0 * b1 - a1 * b0
+    return out
 
-        if r_norm < 1e-6:
-            return np.zeros_like(r_rel)
+def _cross_rows(a, b, out, tmp):
+    # Row-wise cross product of (N, 3) arrays into `out`, using the (N,) `tmp`
+    for i, j, k in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+        np.multiply(a[:, j], b[:, k], out=out[:, i])
+        np.multiply(a[:, k], b[:, j], out=tmp)
+        out[:, i] -= tmp
+    return out
 
-        los = r_rel / r_norm
-        los_rate = np.cross(r_rel, v_rel) / (r_norm**2 + 1e-6)
-        acc_cmd = self.N * np.cross(los_rate, pursuer_vel)
-        return acc_cmd
+def _scale_rows(a, w):
+    # a *= w[:, None], column by column (the broadcast form allocates an iterator buffer)
+    for i in range(a.shape[1]):
+        np.multiply(a[:, i], w, out=a[:, i])
+    return a
@@ -4,13 +4,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 from attitude_controller import AttitudeController3D
-
-# ========== Utility: 3D Helical Target ==========
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
+from target import HelicalTarget
+from vehicle import Fleet
 
 # ========== Utility: Map desired acceleration to attitude ==========
 def compute_desired_attitude(acc_des, g=9.81):
@@ -25,12 +20,8 @@ def compute_desired_attitude(acc_des, g=9.81):
 dt = 0.05
 N = 400
 
-traj_target = []
-for i in range(N):
-    t = i * dt
-    target = helical_target(t)
-    traj_target.append(target)
-traj_target = np.array(traj_target)
+helix = HelicalTarget()
+traj_target = helix.positions(np.arange(N) * dt)
 
 fig = plt.figure(figsize=(7,6))
 ax = fig.add_subplot(111, projection='3d')
@@ -48,12 +39,9 @@ plt.show()
 # ========== Day 3: Pure Pursuit (Kinematic, 3D) ==========
 pursuer_pos = np.array([-7.0, -7.0, 0.0])
 traj_pursuer = [pursuer_pos.copy()]
-traj_target = []
 
 for i in range(N):
-    t = i * dt
-    target = helical_target(t)
-    traj_target.append(target.copy())
+    target = traj_target[i]
     # Pure pursuit: move directly toward target at constant speed
     direction = target - pursuer_pos
     if np.linalg.norm(direction) > 1e-3:
@@ -62,7 +50,6 @@ for i in range(N):
     pursuer_pos += direction * speed * dt
     traj_pursuer.append(pursuer_pos.copy())
 
-traj_target = np.array(traj_target)
 traj_pursuer = np.array(traj_pursuer)
 
 fig = plt.figure(figsize=(7,6))
@@ -82,20 +69,14 @@ plt.show()
 
 # ========== Day 4: Outer & Inner Loop Control (Position & Attitude) ==========
 
-# ====== Target Trajectory (Helix) ======
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
-
 # ====== Map desired acceleration to attitude (roll, pitch, yaw) ======
 def compute_desired_attitude(acc_des, g=9.81):
-    ax, ay, az = acc_des
+    # acc_des: (..., 3); returns (..., 3) attitudes for every vehicle at once
+    ax, ay, az = acc_des[..., 0], acc_des[..., 1], acc_des[..., 2]
     pitch = np.arctan2(ax, az + g)
     roll  = -np.arctan2(ay, az + g)
     yaw   = np.arctan2(ay, ax)
-    return roll, pitch, yaw
+    return np.stack([roll, pitch, yaw], axis=-1)
 
 # ====== Attitude Controller Gains ======
 gains = {
@@ -103,27 +84,29 @@ gains = {
     'pitch': (0.2, 0.01, 0.01, np.deg2rad(10)),
     'yaw':   (0.1, 0.00, 0.01, np.deg2rad(20))
 }
-att_ctrl = AttitudeController3D(gains)
 
 # ====== Simulation Parameters ======
 dt = 0.05
 N = 400
 max_thrust = 3.0  # [m/s^2], max allowed acceleration (lowered for stability)
 max_vel = 3.0     # [m/s], max allowed speed
+n_pursuers = 1    # vehicles simulated together; vehicle 0 is plotted
 
-# ====== Initial states ======
-pursuer_pos = np.array([-7.0, -7.0, 0.0])
-pursuer_vel = np.zeros(3)
-pursuer_att = np.zeros(3)  # roll, pitch, yaw
+att_ctrl = AttitudeController3D(gains, n_vehicles=n_pursuers)
 
-traj_pursuer = [pursuer_pos.copy()]
-traj_target = []
+# ====== Initial states (one row per vehicle) ======
+start_pos = np.tile([-7.0, -7.0, 0.0], (n_pursuers, 1))
+# Vehicle 0 starts at the nominal point; the others are jittered around it
+start_pos[1:] += np.random.default_rng(0).normal(0, 0.5, (n_pursuers - 1, 3))
+fleet = Fleet(n_pursuers, pos=start_pos, max_acc=max_thrust, max_vel=max_vel)
+pursuer_pos, pursuer_vel, pursuer_att = fleet.pos, fleet.vel, fleet.att  # views; att is (roll, pitch, yaw)
+
+traj_pursuer = [pursuer_pos[0].copy()]
+traj_target = helix.positions(np.arange(N) * dt)
 
 # ====== Main Simulation Loop ======
 for i in range(N):
-    t = i * dt
-    target = helical_target(t)
-    traj_target.append(target.copy())
+    target = traj_target[i]
 
     # Outer loop PD control for position
     pos_error = target - pursuer_pos
@@ -140,18 +123,14 @@ for i in range(N):
     att_cmd = att_ctrl.compute(att_des, pursuer_att, dt)
 
     # For this demo, simply apply acc_cmd as thrust in world frame
-    pursuer_vel += acc_cmd * dt
-    pursuer_vel = np.clip(pursuer_vel, -max_vel, max_vel)
-    pursuer_pos += pursuer_vel * dt
+    fleet.integrate(acc_cmd, dt, att_rate=att_cmd)
 
-    traj_pursuer.append(pursuer_pos.copy())
-    pursuer_att += att_cmd * dt
+    traj_pursuer.append(pursuer_pos[0].copy())
 
     # Print debug info every 50 steps
     if i % 50 == 0:
-        print(f"Step {i}: pos={pursuer_pos}, vel={pursuer_vel}, acc={acc_cmd}")
+        print(f"Step {i}: pos={pursuer_pos[0]}, vel={pursuer_vel[0]}, acc={acc_cmd[0]}")
 
-traj_target = np.array(traj_target)
 traj_pursuer = np.array(traj_pursuer)
 
 # ====== Plot ======
@@ -0,0 +1,57 @@
+# src/metrics.py
+
+import numpy as np
+
+def segment_closest_approach(rel_start, rel_end):
+    """
+    Closest approach inside one step, assuming the relative position moves
+    linearly from rel_start to rel_end. The Euler pursuer does move in a
+    straight line each step, but a curving target (e.g. the helix) does not,
+    so the result is a close approximation with an O(dt^2) error in the path.
+    Args:
+        rel_start (np.array): (..., 3) relative position at the step start.
+        rel_end (np.array): (..., 3) relative position at the step end.
+    Returns:
+        (np.array, np.array): Fraction of the step in [0, 1] at which the
+            minimum occurs, and the minimum distance.
+    """
+    delta = rel_end - rel_start
+    dd = np.einsum("...i,...i->...", delta, delta)
+    rd = np.einsum("...i,...i->...", rel_start, delta)
+    frac = np.divide(-rd, dd, out=np.zeros_like(dd), where=dd > 0)
+    np.clip(frac, 0.0, 1.0, out=frac)
+    closest = rel_start + frac[..., None] * delta
+    return frac, np.linalg.norm(closest, axis=-1)
+
+def closest_approach(traj_pursuer, traj_target, dt=None, t0=0.0, times=None):
+    """
+    Continuous closest point of approach over a sampled engagement.
+
+    Both trajectories must be sampled at the same instants: t0 + k*dt, or
+    the (possibly non-uniform) sample `times`. The minimum is solved inside
+    every step interval, so the result does not depend on a sample landing
+    near the terminal pass.
+    Args:
+        traj_pursuer (np.array): (..., K, 3) pursuer positions.
+        traj_target (np.array): (..., K, 3) target positions.
+        dt (float): Sample spacing [s].
+        t0 (float): Time of the first sample [s].
+        times (np.array or None): (K,) sample times, instead of dt/t0.
+    Returns:
+        (cpa_time, cpa_distance): Arrays of shape (...) (floats for a single run).
+    """
+    rel = np.asarray(traj_pursuer) - np.asarray(traj_target)
+    if rel.shape[-2] < 2:
+        dist = np.linalg.norm(rel[..., 0, :], axis=-1)
+        start = t0 if times is None else times[0]
+        return np.full_like(dist, start)[()], dist[()]
+    frac, dist = segment_closest_approach(rel[..., :-1, :], rel[..., 1:, :])
+    k = np.argmin(dist, axis=-1)
+    cpa_distance = np.take_along_axis(dist, k[..., None], axis=-1)[..., 0]
+    cpa_frac = np.take_along_axis(frac, k[..., None], axis=-1)[..., 0]
+    if times is None:
+        cpa_time = t0 + (k + cpa_frac) * dt
+    else:
+        times = np.asarray(times, dtype=float)
+        cpa_time = times[k] + cpa_frac * (times[k + 1] - times[k])
+    return cpa_time[()], cpa_distance[()]
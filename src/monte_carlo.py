@@ -0,0 +1,593 @@
+# src/monte_carlo.py
+
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
+from position_controller import PositionController
+from target import HelicalTarget
+from metrics import segment_closest_approach
+from trajectory_cache import get_cache, release_cache, target_tables
+from trajectory_file import SHARED, TrajectoryWriter
+from stats import TrialAggregator, TrialRetainer, mean_interval, wilson_interval
+from result_store import ResultStore
+from sampling import SAMPLING
+from sensors import draw_noise_tape, draw_trial_tapes, trial_rng
+
+# --- Batched Monte Carlo engine ---
+def run_guidance_batch(guidance, runs=100, noise=0.1, disturbance=True, dt=0.05, N=400,
+                       capture_radius=0.5, rng=None, tapes=None, target=None, cache=None,
+                       stop_on_capture=False, miss_window=None, cpa=False, max_acc=None, record=False):
+    """
+    Run `runs` independent guidance trials in lockstep.
+
+    Pursuer states are held as (runs, 3) arrays and every trial is advanced
+    together each time step, so the Python loop is over the N time steps
+    only. Sensor noise, disturbance spikes, capture detection and energy
+    accumulation are all evaluated on arrays.
+
+    With early termination enabled, finished trials are dropped from the
+    working arrays, so later steps only compute the trials still engaged.
+    Their metrics cover the steps up to termination.
+
+    Args:
+        guidance: PurePursuitGuidance or ProportionalNavigationGuidance instance,
+            or a PositionController tracking the target directly.
+        runs (int): Number of Monte Carlo trials.
+        noise (float): Position noise stddev (velocity noise is 0.1x this).
+        disturbance (bool): Inject random acceleration spikes (5% per step).
+        dt (float): Time step [s].
+        N (int): Number of steps.
+        capture_radius (float): Distance counted as an intercept [m].
+        rng (np.random.Generator or None): Random source (default: fresh generator).
+        tapes (dict or None): Pre-drawn (runs, N, 3) noise from draw_trial_tapes.
+            When None, each step's noise is drawn from rng for the trials
+            still running, so memory stays O(runs). Tapes take 72 * N bytes
+            per trial (about 2.9 GB for 1e5 runs at N=400), so callers
+            passing tapes for large `runs` must split the trials into
+            chunks (see iter_guidance_chunks).
+        target: Object with positions(t)/velocities(t) (default: HelicalTarget()).
+        cache (TrajectoryCache or None): Cache for target tables (default:
+            the process-wide in-memory cache).
+        stop_on_capture (bool): Stop a trial once it is inside capture_radius.
+        miss_window (int or None): Stop a trial once its range has grown for
+            this many consecutive steps after closest approach.
+        cpa (bool): Report the continuous closest point of approach: miss
+            distance is solved inside each step from same-instant relative
+            positions, and a cpa_time column is added.
+        max_acc (float or None): Per-axis actuator limit applied to the command.
+        record (bool): Also record per-step trajectories and diagnostics.
+            Meant for a few trials (e.g. replay_trial); memory is O(runs * N).
+    Returns:
+        pd.DataFrame: One row per trial with miss_distance, time_to_intercept
+            (NaN when no intercept), energy and steps (steps simulated; N
+            unless the trial terminated early).
+        With record=True, (df, trace) where trace holds (runs, N + 1, 3)
+        pursuer_pos/pursuer_vel (state after step i at index i + 1),
+        (N + 1, 3) target_pos, and per step (runs, N, 3) measured_pos,
+        command (after saturation, before disturbance), spikes and acc, and
+        (runs, N) range. Steps after a trial terminated are NaN.
+    """
+    if not isinstance(guidance, (PurePursuitGuidance, ProportionalNavigationGuidance, PositionController)):
+        raise ValueError("Unknown guidance type")
+
+    if target is None:
+        target = HelicalTarget()
+    # One extra sample so the state after the last step has a same-instant target
+    traj_target, target_vel = target_tables(target, dt, N + 1, cache)
+
+    early_stop = stop_on_capture or miss_window is not None
+    if tapes is None and rng is None:
+        rng = np.random.default_rng()
+
+    # Per-trial outputs, indexed by trial
+    miss_distance = np.full(runs, np.inf)
+    time_to_intercept = np.full(runs, np.nan)
+    energy = np.zeros(runs)
+    cpa_time = np.full(runs, np.nan)
+    steps = np.full(runs, N)
+
+    # Working arrays for the trials still running; `ids` maps rows to trials
+    ids = np.arange(runs)
+    pursuer_pos = np.tile([-7.0, -7.0, 0.0], (runs, 1))
+    pursuer_vel = np.zeros((runs, 3))
+    acc = np.empty((runs, 3))
+    w_miss = miss_distance.copy()
+    w_tti = time_to_intercept.copy()
+    w_energy = energy.copy()
+    w_cpa_time = cpa_time.copy()
+    rel_prev = pursuer_pos - traj_target[0]
+    # Opening is measured against the starting range, so step 1 only counts as closing if it closed
+    prev_dist = np.linalg.norm(rel_prev, axis=1)
+    opening = np.zeros(runs, dtype=int)
+    approached = np.zeros(runs, dtype=bool)
+    if record:
+        trace = {key: np.full((runs, N + 1, 3), np.nan) for key in ("pursuer_pos", "pursuer_vel")}
+        trace.update({key: np.full((runs, N, 3), np.nan) for key in ("measured_pos", "command", "spikes", "acc")})
+        trace["range"] = np.full((runs, N), np.nan)
+        trace["target_pos"] = traj_target
+        trace["pursuer_pos"][:, 0] = pursuer_pos
+        trace["pursuer_vel"][:, 0] = pursuer_vel
+
+    for i in range(N):
+        n = len(ids)
+        if n == 0:
+            break
+        target_pos = traj_target[i]
+
+        if tapes is None:
+            step_noise = draw_noise_tape(rng, (n,), noise=noise, disturbance=disturbance)
+        elif n == runs:
+            step_noise = {key: tape[:, i] for key, tape in tapes.items()}
+        else:
+            step_noise = {key: tape[ids, i] for key, tape in tapes.items()}
+        noisy_pos = pursuer_pos + step_noise["pos_noise"]
+        noisy_vel = pursuer_vel + step_noise["vel_noise"]
+
+        if isinstance(guidance, PurePursuitGuidance):
+            guidance.compute_command_batch(noisy_pos, target_pos, out=acc)
+        elif isinstance(guidance, PositionController):
+            guidance.compute_acceleration_batch(noisy_pos, noisy_vel, target_pos, out=acc)
+        else:
+            guidance.compute_command_batch(noisy_pos, noisy_vel, target_pos, target_vel[i], out=acc)
+        if max_acc is not None:
+            np.clip(acc, -max_acc, max_acc, out=acc)
+
+        if record:
+            trace["command"][ids, i] = acc
+        acc += step_noise["spikes"]
+
+        pursuer_vel += acc * dt
+        pursuer_pos += pursuer_vel * dt
+        w_energy += np.einsum("ij,ij->i", acc, acc) * dt
+
+        dist = np.linalg.norm(pursuer_pos - target_pos, axis=1)
+        if record:
+            trace["measured_pos"][ids, i] = noisy_pos
+            trace["spikes"][ids, i] = step_noise["spikes"]
+            trace["acc"][ids, i] = acc
+            trace["pursuer_pos"][ids, i + 1] = pursuer_pos
+            trace["pursuer_vel"][ids, i + 1] = pursuer_vel
+            trace["range"][ids, i] = dist
+        if cpa:
+            rel_now = pursuer_pos - traj_target[i + 1]
+            frac, seg_dist = segment_closest_approach(rel_prev, rel_now)
+            better = seg_dist < w_miss
+            w_miss[better] = seg_dist[better]
+            w_cpa_time[better] = (i + frac[better]) * dt
+            rel_prev = rel_now
+        else:
+            np.minimum(w_miss, dist, out=w_miss)
+        captured = np.isnan(w_tti) & (dist < capture_radius)
+        w_tti[captured] = i * dt
+
+        if not early_stop:
+            continue
+        done = ~np.isnan(w_tti) if stop_on_capture else np.zeros(n, dtype=bool)
+        if miss_window is not None:
+            # Only count opening range once the trial has been closing (past CPA)
+            closing = dist < prev_dist
+            approached |= closing
+            opening = np.where(approached & ~closing, opening + 1, 0)
+            prev_dist = dist
+            done |= opening >= miss_window
+        if done.any():
+            finished = ids[done]
+            miss_distance[finished] = w_miss[done]
+            time_to_intercept[finished] = w_tti[done]
+            energy[finished] = w_energy[done]
+            cpa_time[finished] = w_cpa_time[done]
+            steps[finished] = i + 1
+            keep = ~done
+            ids = ids[keep]
+            pursuer_pos, pursuer_vel, acc = pursuer_pos[keep], pursuer_vel[keep], acc[keep]
+            w_miss, w_tti, w_energy = w_miss[keep], w_tti[keep], w_energy[keep]
+            w_cpa_time, rel_prev = w_cpa_time[keep], rel_prev[keep]
+            prev_dist, opening, approached = prev_dist[keep], opening[keep], approached[keep]
+
+    miss_distance[ids] = w_miss
+    time_to_intercept[ids] = w_tti
+    energy[ids] = w_energy
+    cpa_time[ids] = w_cpa_time
+
+    df = pd.DataFrame({
+        "miss_distance": miss_distance,
+        "time_to_intercept": time_to_intercept,
+        "energy": energy,
+    })
+    if cpa:
+        df["cpa_time"] = cpa_time
+    df["steps"] = steps
+    if record:
+        return df, trace
+    return df
+
+# --- Parallel runner ---
+def _run_chunk(guidance, start, stop, seed, sim_kwargs, cache_dir=None):
+    trials = np.arange(start, stop)
+    sim_kwargs = dict(sim_kwargs)
+    tapes = draw_trial_tapes(seed, trials,
+                             N=sim_kwargs.get("N", 400),
+                             noise=sim_kwargs.get("noise", 0.1),
+                             disturbance=sim_kwargs.get("disturbance", True),
+                             sampling=sim_kwargs.pop("sampling", "random"))
+    df = run_guidance_batch(guidance, runs=len(trials), tapes=tapes,
+                            cache=get_cache(cache_dir), **sim_kwargs)
+    # (seed, trial) is the trial's replay key (see replay_trial)
+    df.insert(0, "trial", trials)
+    df.insert(1, "seed", seed)
+    return df
+
+def _aggregate_chunk(guidance, start, stop, seed, sim_kwargs, cache_dir=None):
+    return TrialAggregator().update(_run_chunk(guidance, start, stop, seed, sim_kwargs, cache_dir))
+
+def _retain_chunk(guidance, start, stop, seed, sim_kwargs, cache_dir=None):
+    sim_kwargs = dict(sim_kwargs)
+    retain = sim_kwargs.pop("retain")
+    df = _run_chunk(guidance, start, stop, seed, sim_kwargs, cache_dir)
+    return TrialAggregator().update(df), TrialRetainer(seed=seed, **retain).update(df)
+
+def _study_chunk(guidance, start, stop, seed, sim_kwargs, cache_dir=None):
+    # Chunk of a stack of studies: trials [b * runs, (b + 1) * runs) are trials
+    # 0..runs-1 of study b, which runs `sampling` on seed + replicate
+    sim_kwargs = dict(sim_kwargs)
+    runs, studies = sim_kwargs.pop("study_runs"), sim_kwargs.pop("studies")
+    b = start // runs
+    sampling, replicate = studies[b]
+    df = _run_chunk(guidance, start - b * runs, stop - b * runs, seed + replicate,
+                    {**sim_kwargs, "sampling": sampling}, cache_dir)
+    return b, df
+
+def chunk_bounds(runs, chunk_size):
+    return [(start, min(start + chunk_size, runs)) for start in range(0, runs, chunk_size)]
+
+def iter_guidance_chunks(guidance, runs=100, seed=0, workers=None, chunk_size=1000,
+                         task=_run_chunk, bounds=None, **sim_kwargs):
+    """
+    Yield task(guidance, start, stop, seed, sim_kwargs, cache_dir) for
+    consecutive trial chunks (or the given `bounds`), in trial order.
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    by the chunk size however many trials are run.
+    """
+    workers = workers or os.cpu_count() or 1
+    if bounds is None:
+        bounds = chunk_bounds(runs, chunk_size)
+
+    if workers == 1 or len(bounds) <= 1:
+        for start, stop in bounds:
+            yield task(guidance, start, stop, seed, sim_kwargs)
+        return
+
+    cache_dir = tempfile.mkdtemp(prefix="trajectory_cache_")
+    try:
+        target = sim_kwargs.get("target") or HelicalTarget()
+        # Targets without cache_key() are tabulated in each worker instead
+        if hasattr(target, "cache_key"):
+            get_cache(cache_dir).get(target, sim_kwargs.get("dt", 0.05), sim_kwargs.get("N", 400) + 1)
+        workers = min(workers, len(bounds))
+        pending = deque()
+        todo = iter(bounds)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for start, stop in todo:
+                pending.append(pool.submit(task, guidance, start, stop, seed, sim_kwargs, cache_dir))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                for start, stop in todo:
+                    pending.append(pool.submit(task, guidance, start, stop, seed, sim_kwargs, cache_dir))
+                    break
+                yield result
+    finally:
+        release_cache(cache_dir)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+def run_guidance_parallel(guidance, runs=100, seed=0, workers=None, chunk_size=1000, **sim_kwargs):
+    """
+    Spread `runs` trials over a process pool in chunks of `chunk_size`.
+
+    Trial i always uses trial_rng(seed, i), so the returned table is
+    bit-identical for any worker count or chunk size. The target table is
+    built once in the parent and memory-mapped by the workers.
+
+    Args:
+        guidance: PurePursuitGuidance or ProportionalNavigationGuidance instance.
+        runs (int): Number of Monte Carlo trials.
+        seed (int): Root seed of the SeedSequence spawn tree.
+        workers (int or None): Process count (default: os.cpu_count()); 1 runs in-process.
+        chunk_size (int): Trials per task.
+        **sim_kwargs: Forwarded to run_guidance_batch (noise, disturbance, dt, N,
+            capture_radius, target), plus `sampling` (a draw_trial_tapes strategy).
+    Returns:
+        pd.DataFrame: Per-trial table ordered by trial index.
+    """
+    return pd.concat(list(iter_guidance_chunks(guidance, runs, seed, workers, chunk_size, **sim_kwargs)),
+                     ignore_index=True)
+
+def run_guidance_streaming(guidance, runs=100, seed=0, workers=None, chunk_size=1000, **sim_kwargs):
+    """
+    Like run_guidance_parallel, but each worker reduces its chunk to a
+    TrialAggregator and the parent merges them, so memory does not grow
+    with `runs`.
+    Returns:
+        TrialAggregator: Streaming statistics over all trials.
+    """
+    total = TrialAggregator()
+    for partial in iter_guidance_chunks(guidance, runs, seed, workers, chunk_size,
+                                        task=_aggregate_chunk, **sim_kwargs):
+        total.merge(partial)
+    return total
+
+def run_guidance_retaining(guidance, runs=100, seed=0, workers=None, chunk_size=1000, k=5, reservoir=20,
+                           path=None, **sim_kwargs):
+    """
+    Streaming run that also picks trials to keep trajectories for: the k
+    worst by miss distance, energy and time to intercept, and a uniform
+    sample of `reservoir` typical trials.
+
+    Workers return only their aggregates and bounded selections, so memory
+    is independent of `runs`. Trajectories are never held during the run:
+    the selected trials are replayed from their seed keys afterwards and,
+    with `path`, saved to a .traj file by save_retained.
+    Returns:
+        (TrialAggregator, TrialRetainer): Statistics and selected trials.
+    """
+    total = TrialAggregator()
+    retained = TrialRetainer(k=k, reservoir=reservoir, seed=seed)
+    for agg, partial in iter_guidance_chunks(guidance, runs, seed, workers, chunk_size, task=_retain_chunk,
+                                             retain={"k": k, "reservoir": reservoir}, **sim_kwargs):
+        total.merge(agg)
+        retained.merge(partial)
+    if path is not None:
+        save_retained(path, guidance, retained, seed=seed, **sim_kwargs)
+    return total, retained
+
+def run_guidance_to_store(guidance, directory, runs=100, seed=0, workers=None, chunk_size=1000, **sim_kwargs):
+    """
+    Run trials into a ResultStore at `directory`, checkpointing every chunk.
+
+    Chunks already in the store's manifest are skipped, so rerunning after
+    a crash (or with a larger `runs`) only computes the missing trials. The
+    store refuses to resume with a different guidance, seed, chunk size or
+    simulation setting.
+    Returns:
+        ResultStore: The store holding all `runs` trials.
+    """
+    # Underscore attributes are scratch buffers, created once the law is first used
+    params = {k: v for k, v in vars(guidance).items() if not k.startswith("_")}
+    meta = {"guidance": type(guidance).__name__, "guidance_params": params,
+            "seed": seed, "chunk_size": chunk_size,
+            "sim_kwargs": {k: (v.cache_key() if hasattr(v, "cache_key") else v)
+                           for k, v in sorted(sim_kwargs.items())}}
+    store = ResultStore(directory, meta=meta)
+    todo = store.missing(chunk_bounds(runs, chunk_size))
+    if todo:
+        chunks = iter_guidance_chunks(guidance, runs, seed, workers, chunk_size, bounds=todo, **sim_kwargs)
+        for (start, stop), df in zip(todo, chunks):
+            store.append(start, stop, df)
+    return store
+
+# --- Paired comparison ---
+def compare_guidance(guidance_a, guidance_b, runs=1000, seed=0, metric="miss_distance",
+                     common_random_numbers=True, z=1.96, **kwargs):
+    """
+    Compare two guidance laws on a metric.
+
+    With common random numbers both laws replay the same trial tapes, so
+    trial i is a matched pair and the comparison uses the per-trial
+    differences; the noise shared by both runs cancels. Otherwise law B
+    runs on an independent seed and the difference of means is used.
+    Trials where either metric is NaN (e.g. no intercept) are dropped.
+
+    Args:
+        guidance_a, guidance_b: Guidance laws accepted by run_guidance_batch.
+        runs (int): Trials per law.
+        seed (int): Root seed.
+        metric (str): Column to compare.
+        common_random_numbers (bool): Pair the trials on shared tapes.
+        z (float): Critical value (1.96 = two-sided 95%).
+        **kwargs: Forwarded to run_guidance_parallel.
+    Returns:
+        dict: mean_a, mean_b, diff (A - B), std_err, z_score, trials and
+            trials_needed, the runs per law at which |diff| would be
+            significant at this spread.
+    """
+    a = run_guidance_parallel(guidance_a, runs=runs, seed=seed, **kwargs)[metric].to_numpy()
+    seed_b = seed if common_random_numbers else seed + 1
+    b = run_guidance_parallel(guidance_b, runs=runs, seed=seed_b, **kwargs)[metric].to_numpy()
+    keep = ~(np.isnan(a) | np.isnan(b))
+    a, b = a[keep], b[keep]
+    n = len(a)
+    diff = a.mean() - b.mean()
+    if common_random_numbers:
+        spread = np.std(a - b, ddof=1)
+    else:
+        spread = np.sqrt(np.var(a, ddof=1) + np.var(b, ddof=1))
+    std_err = spread / np.sqrt(n)
+    return {
+        "mean_a": float(a.mean()),
+        "mean_b": float(b.mean()),
+        "diff": float(diff),
+        "std_err": float(std_err),
+        "z_score": float(diff / std_err) if std_err > 0 else np.inf,
+        "trials": n,
+        "trials_needed": int(np.ceil((z * spread / diff) ** 2)) if diff != 0 else np.inf,
+    }
+
+def compare_sampling(guidance, runs=256, replicates=8, strategies=SAMPLING, seed=0, workers=None, chunk_size=1000,
+                     **sim_kwargs):
+    """
+    Estimator variance of each sampling strategy at a fixed trial budget.
+
+    Each strategy is run `replicates` times with independent seeds (new
+    streams, antithetic pairs or Halton scrambles), and the variance of the
+    replicate estimates of mean miss distance and failure (no intercept)
+    rate is compared with plain random sampling. The gain is the variance
+    ratio, and effective_trials = runs * gain is how many random trials
+    would give the same precision. All strategies and replicates share one
+    process pool.
+    Returns:
+        pd.DataFrame: One row per (strategy, metric) with estimate, variance,
+            gain and effective_trials.
+    """
+    # Every (strategy, replicate) study goes through one pool as a single stacked run
+    studies = [(strategy, rep) for strategy in strategies for rep in range(replicates)]
+    bounds = [(b * runs + start, b * runs + stop)
+              for b in range(len(studies)) for start, stop in chunk_bounds(runs, chunk_size)]
+    miss = np.zeros(len(studies))
+    failures = np.zeros(len(studies))
+    for b, df in iter_guidance_chunks(guidance, seed=seed, workers=workers, task=_study_chunk, bounds=bounds,
+                                      study_runs=runs, studies=studies, **sim_kwargs):
+        miss[b] += df["miss_distance"].sum()
+        failures[b] += df["time_to_intercept"].isna().sum()
+    estimates = {}
+    for strategy in strategies:
+        rows = [studies.index((strategy, rep)) for rep in range(replicates)]
+        estimates[strategy] = pd.DataFrame({"miss_distance": miss[rows] / runs,
+                                            "failure_rate": failures[rows] / runs})
+
+    report = []
+    for strategy, df in estimates.items():
+        for metric in df.columns:
+            variance = df[metric].var()
+            baseline = estimates["random"][metric].var() if "random" in estimates else np.nan
+            gain = baseline / variance if variance > 0 else (np.nan if baseline == 0 else np.inf)
+            report.append({"strategy": strategy, "metric": metric, "estimate": df[metric].mean(),
+                           "variance": variance, "gain": gain, "effective_trials": runs * gain})
+    return pd.DataFrame(report)
+
+# --- Sequential runner ---
+def run_guidance_sequential(guidance, seed=0, miss_half_width=0.01, failure_half_width=0.01, z=1.96,
+                            min_runs=100, max_runs=100000, workers=None, chunk_size=1000, **sim_kwargs):
+    """
+    Run trials in batches until the CI half-widths on mean miss distance
+    (normal interval) and failure probability (Wilson interval) reach
+    their targets, or `max_runs` is hit.
+
+    After each batch the trials still needed are projected from the
+    current spread (z^2 s^2 / h^2 for the mean, z^2 p (1 - p) / h^2 for
+    the rate) and the next batch covers that shortfall, at least `min_runs`
+    and at most doubling the trials so far. Easy cases stop after a
+    batch or two; noisy ones keep going. Trial i still uses trial i's
+    tape, so a sequential run is a prefix of the fixed-size run.
+
+    Args:
+        guidance: Guidance law accepted by run_guidance_batch.
+        seed (int): Root seed.
+        miss_half_width (float): Target half-width on mean miss distance [m].
+        failure_half_width (float): Target half-width on failure probability.
+        z (float): Critical value (1.96 = 95%).
+        min_runs (int): First (and minimum) batch size.
+        max_runs (int): Hard trial cap.
+        workers, chunk_size: As in run_guidance_parallel.
+        **sim_kwargs: Forwarded to run_guidance_batch (and `sampling`).
+    Returns:
+        (TrialAggregator, dict): Statistics over all trials run, and a report
+            with trials, batches, converged, the miss mean and failure rate,
+            their intervals and achieved half-widths.
+    """
+    if min_runs < 1 or max_runs < 1:
+        raise ValueError(f"min_runs and max_runs must be at least 1, got {min_runs} and {max_runs}")
+    agg = TrialAggregator()
+    batches = 0
+    batch = min(min_runs, max_runs)
+    while batch > 0:
+        n = agg.trials
+        bounds = chunk_bounds(batch, chunk_size)
+        for partial in iter_guidance_chunks(guidance, seed=seed, workers=workers, task=_aggregate_chunk,
+                                            bounds=[(n + a, n + b) for a, b in bounds], **sim_kwargs):
+            agg.merge(partial)
+        batches += 1
+
+        n = agg.trials
+        miss = agg.stats["miss_distance"]
+        miss_ci = mean_interval(miss, z)
+        failure_rate = agg.failures / n
+        failure_ci = wilson_interval(agg.failures, n, z)
+        miss_hw = float(miss_ci[1] - miss_ci[0]) / 2
+        failure_hw = (failure_ci[1] - failure_ci[0]) / 2
+        converged = miss_hw <= miss_half_width and failure_hw <= failure_half_width
+        if converged:
+            break
+        # A rate of exactly 0 or 1 still has a Wilson half-width of order z^2 / n
+        needed = max(z ** 2 * np.nan_to_num(miss.variance) / miss_half_width ** 2,
+                     z ** 2 * max(failure_rate * (1 - failure_rate), 1 / n) / failure_half_width ** 2)
+        batch = int(min(max(needed - n, min_runs), n, max_runs - n))
+
+    return agg, {
+        "trials": agg.trials,
+        "batches": batches,
+        "converged": converged,
+        "miss_distance": float(miss.mean),
+        "miss_ci": tuple(map(float, miss_ci)),
+        "miss_half_width": miss_hw,
+        "failure_rate": failure_rate,
+        "failure_ci": tuple(map(float, failure_ci)),
+        "failure_half_width": failure_hw,
+    }
+
+# --- Single-trial replay ---
+def replay_trial(guidance, trial, seed=0, **sim_kwargs):
+    """
+    Re-run one trial of a study on its own, with full trajectories.
+
+    A trial is fully determined by its (seed, trial) key (the `seed` and
+    `trial` columns of every runner's output) and the study settings: its
+    noise tape is redrawn from trial_rng(seed, trial) alone and run through
+    the batch engine as a batch of one, so the replay costs one run and
+    reproduces the stored metrics exactly.
+
+    Args:
+        guidance: The study's guidance law.
+        trial (int): Trial index.
+        seed (int): The study's root seed.
+        **sim_kwargs: The study's settings (noise, disturbance, N, dt,
+            sampling, ...); early-termination options may be dropped to see
+            the trajectory past termination.
+    Returns:
+        (pd.Series, dict): The trial's metrics and its trace (see
+            run_guidance_batch(record=True)), with the batch axis removed.
+    """
+    sim_kwargs = dict(sim_kwargs)
+    sampling = sim_kwargs.pop("sampling", "random")
+    # Every sampling strategy derives a trial's tape from (seed, trial) alone
+    tapes = draw_trial_tapes(seed, [trial], N=sim_kwargs.get("N", 400), noise=sim_kwargs.get("noise", 0.1),
+                             disturbance=sim_kwargs.get("disturbance", True), sampling=sampling)
+    df, trace = run_guidance_batch(guidance, runs=1, tapes=tapes, record=True, **sim_kwargs)
+    row = df.iloc[0].copy()
+    row["trial"], row["seed"] = trial, seed
+    return row, {key: (value if key == "target_pos" else value[0]) for key, value in trace.items()}
+
+def save_retained(path, guidance, retainer, seed=0, dtype="float32", delta=True, **sim_kwargs):
+    """
+    Replay a TrialRetainer's trials and save their trajectories to a .traj
+    file (see trajectory_file), one run per trial.
+
+    Each run holds pursuer (N + 1, 3), acc (N, 3) and range (N, 1) blocks.
+    The target (N + 1, 3), the same in every trial, is stored once as a
+    SHARED block, so file[trial, "target"] still reads it. The metadata
+    records dt, the selections as [label, trial] pairs and each trial's
+    metrics. A trial selected under several labels is stored once.
+    """
+    selections = retainer.selections()
+    trials = list(dict.fromkeys(trial for _, trial in selections))
+    meta = {"dt": sim_kwargs.get("dt", 0.05), "seed": seed, "guidance": type(guidance).__name__,
+            "selections": [[label, trial] for label, trial in selections], "metrics": {}}
+    with TrajectoryWriter(path, dtype=dtype, delta=delta, meta=meta) as writer:
+        for k, trial in enumerate(trials):
+            row, trace = replay_trial(guidance, trial, seed=seed, **sim_kwargs)
+            if k == 0:
+                writer.write(SHARED, "target", trace["target_pos"])
+            writer.write(trial, "pursuer", trace["pursuer_pos"])
+            writer.write(trial, "acc", trace["acc"])
+            writer.write(trial, "range", trace["range"])
+            writer.meta["metrics"][str(trial)] = {m: float(row[m]) for m in
+                                                  ("miss_distance", "time_to_intercept", "energy")}
+    return path
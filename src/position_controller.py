@@ -1,3 +1,5 @@
+import math
+
 import numpy as np
 
 class PositionController:
@@ -9,7 +11,7 @@ class PositionController:
         self.kd = kd
         self.max_acc = max_acc
 
-    def compute_acceleration(self, current_pos, current_vel, desired_pos, desired_vel=None):
+    def compute_acceleration(self, current_pos, current_vel, desired_pos, desired_vel=None, out=None):
         """
         Compute PD acceleration command.
         Args:
@@ -17,16 +19,46 @@ class PositionController:
             current_vel (np.array): Current velocity.
             desired_pos (np.array): Target position.
             desired_vel (np.array or None): Target velocity (default: zero vector).
+            out (np.array or None): Optional preallocated output buffer; the
+                command is then computed without temporaries.
         Returns:
             np.array: Acceleration command, clipped to max_acc.
         """
+        acc_cmd = np.subtract(desired_pos, current_pos, out=out, dtype=float)
+        acc_cmd *= self.kp
+        vel_error = getattr(self, "_vel_error", None)
+        if vel_error is None or vel_error.shape != acc_cmd.shape:
+            vel_error = self._vel_error = np.empty_like(acc_cmd)
         if desired_vel is None:
-            desired_vel = np.zeros_like(current_vel)
-        pos_error = np.array(desired_pos) - np.array(current_pos)
-        vel_error = np.array(desired_vel) - np.array(current_vel)
-        acc_cmd = self.kp * pos_error + self.kd * vel_error
-        norm = np.linalg.norm(acc_cmd)
+            np.negative(current_vel, out=vel_error)
+        else:
+            np.subtract(desired_vel, current_vel, out=vel_error)
+        vel_error *= self.kd
+        acc_cmd += vel_error
+        norm = math.sqrt(acc_cmd @ acc_cmd)
         if norm > self.max_acc:
-            acc_cmd = acc_cmd / norm * self.max_acc
+            acc_cmd *= self.max_acc / norm
         return acc_cmd
 
+    def compute_acceleration_batch(self, current_pos, current_vel, desired_pos, desired_vel=None, out=None):
+        """
+        Batch version of compute_acceleration for many vehicles.
+        Args:
+            current_pos (np.array): (N, 3) positions.
+            current_vel (np.array): (N, 3) velocities.
+            desired_pos (np.array): (N, 3) targets, or a single (3,) target shared by all rows.
+            desired_vel (np.array or None): Same shapes as desired_pos (default: zero).
+            out (np.array or None): Optional preallocated (N, 3) output buffer.
+        Returns:
+            np.array: (N, 3) commands, each row clipped to norm max_acc.
+        """
+        acc_cmd = np.subtract(desired_pos, current_pos, out=out)
+        acc_cmd *= self.kp
+        if desired_vel is None:
+            acc_cmd -= self.kd * current_vel
+        else:
+            acc_cmd += self.kd * (desired_vel - current_vel)
+        norm = np.linalg.norm(acc_cmd, axis=1)
+        over = norm > self.max_acc
+        acc_cmd[over] *= (self.max_acc / norm[over])[:, None]
+        return acc_cmd
@@ -0,0 +1,141 @@
+# src/result_store.py
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+class ResultStore:
+    """
+    Append-only, column-per-file result store for long Monte Carlo runs.
+
+    Each appended chunk covers a row range [start, stop) and is written as
+    one .npy file per column under its own directory. A JSON manifest lists
+    the completed chunks and is replaced atomically after each chunk, so a
+    crashed run loses at most the chunk in progress and can resume from the
+    manifest. Loaders memory-map only the columns they ask for.
+
+    Layout:
+        directory/manifest.json
+        directory/chunk_<start>_<stop>/<column>.npy
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory, meta=None):
+        """
+        Args:
+            directory (str): Store location (created if missing).
+            meta (dict or None): Run parameters (seed, noise, ...). Must match
+                the ones the store was created with, so resumed chunks are
+                never mixed with results from a different configuration.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+            if meta is not None and self.manifest["meta"] != _jsonable(meta):
+                raise ValueError(f"ResultStore at {directory} was written with different "
+                                 f"parameters: {self.manifest['meta']}")
+        else:
+            self.manifest = {"meta": _jsonable(meta or {}), "columns": None, "chunks": []}
+            self._write_manifest()
+
+    # --- Writing ---
+    def append(self, start, stop, data):
+        """
+        Store rows [start, stop) from a DataFrame or dict of equal-length columns.
+        """
+        columns = {name: np.asarray(values) for name, values in data.items()}
+        for name, values in columns.items():
+            if values.dtype == object:
+                columns[name] = values.astype(str)
+            if len(values) != stop - start:
+                raise ValueError(f"Column {name!r} has {len(values)} rows, expected {stop - start}")
+        schema = {name: values.dtype.str for name, values in columns.items()}
+        if self.manifest["columns"] is None:
+            self.manifest["columns"] = schema
+        elif list(schema) != list(self.manifest["columns"]):
+            raise ValueError(f"Columns {list(schema)} do not match store columns "
+                             f"{list(self.manifest['columns'])}")
+
+        name = f"chunk_{start:012d}_{stop:012d}"
+        final = os.path.join(self.directory, name)
+        tmp = f"{final}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for col, values in columns.items():
+            np.save(os.path.join(tmp, f"{col}.npy"), values)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+
+        # A chunk with the same start (e.g. a short tail chunk from a smaller run) is replaced
+        replaced = [c for c in self.manifest["chunks"] if c["start"] == start and c["name"] != name]
+        self.manifest["chunks"] = [c for c in self.manifest["chunks"] if c["start"] != start]
+        self.manifest["chunks"].append({"start": int(start), "stop": int(stop), "name": name})
+        self.manifest["chunks"].sort(key=lambda c: c["start"])
+        self._write_manifest()
+        for c in replaced:
+            shutil.rmtree(os.path.join(self.directory, c["name"]), ignore_errors=True)
+
+    def _write_manifest(self):
+        path = os.path.join(self.directory, self.MANIFEST)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, path)
+
+    # --- Progress ---
+    @property
+    def chunks(self):
+        return [(c["start"], c["stop"]) for c in self.manifest["chunks"]]
+
+    def __len__(self):
+        return sum(stop - start for start, stop in self.chunks)
+
+    def missing(self, bounds):
+        """
+        The (start, stop) ranges from `bounds` that have no completed chunk.
+        """
+        done = set(self.chunks)
+        return [b for b in bounds if tuple(b) not in done]
+
+    # --- Reading ---
+    @property
+    def columns(self):
+        return list(self.manifest["columns"] or [])
+
+    def iter_chunks(self, columns=None, mmap=True):
+        """
+        Yield (start, stop, {column: array}) per chunk in row order, reading
+        only `columns` (default: all).
+        """
+        columns = columns or self.columns
+        mode = "r" if mmap else None
+        for c in self.manifest["chunks"]:
+            chunk_dir = os.path.join(self.directory, c["name"])
+            yield c["start"], c["stop"], {col: np.load(os.path.join(chunk_dir, f"{col}.npy"), mmap_mode=mode)
+                                          for col in columns}
+
+    def column(self, name):
+        """
+        One column over all chunks, concatenated in row order.
+        """
+        parts = [data[name] for _, _, data in self.iter_chunks([name])]
+        if not parts:
+            return np.empty(0, dtype=self.manifest["columns"][name] if self.manifest["columns"] else float)
+        return np.concatenate(parts)
+
+    def load(self, columns=None):
+        """
+        DataFrame of the requested columns over all completed chunks.
+        """
+        columns = columns or self.columns
+        return pd.DataFrame({col: self.column(col) for col in columns})
+
+def _jsonable(meta):
+    # Round-trip through JSON so comparisons see what the manifest stores
+    return json.loads(json.dumps(meta, default=repr))
@@ -0,0 +1,67 @@
+# src/sampling.py
+
+import numpy as np
+
+SAMPLING = ("random", "antithetic", "halton")
+
+def primes(count):
+    """
+    The first `count` primes (sieve of Eratosthenes).
+    """
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    bound = 15 if count < 6 else int(count * (np.log(count) + np.log(np.log(count)))) + 1
+    sieve = np.ones(bound + 1, dtype=bool)
+    sieve[:2] = False
+    for p in range(2, int(bound ** 0.5) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = False
+    return np.flatnonzero(sieve)[:count]
+
+def scrambled_halton(indices, dims, rng):
+    """
+    Points `indices` of a randomly scrambled Halton sequence in [0, 1)^dims.
+
+    Dimension j uses the radical inverse in the j-th prime base, with each
+    digit position passed through a random linear permutation
+    d -> (a * d + c) mod b. Scrambling breaks up the correlation between
+    high-prime dimensions of the plain sequence and makes every point
+    uniform on its own, so averages over the points are unbiased and
+    independent scrambles give replicate estimates.
+
+    Args:
+        indices (array): Point indices (any subset; e.g. one chunk of trials).
+        dims (int): Dimension.
+        rng (np.random.Generator): Source of the scramble; the same generator
+            state gives the same sequence, so chunks can be drawn separately.
+    Returns:
+        np.array: (len(indices), dims) points.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    out = np.empty((len(indices), dims))
+    for j, base in enumerate(primes(dims)):
+        # Enough digits to reach double precision
+        digits = int(np.ceil(53 / np.log2(base)))
+        a = rng.integers(1, base, digits)
+        c = rng.integers(0, base, digits)
+        n = indices.copy()
+        x = np.zeros(len(indices))
+        scale = 1.0
+        for k in range(digits):
+            scale /= base
+            x += ((a[k] * (n % base) + c[k]) % base) * scale
+            n //= base
+        out[:, j] = x
+    return out
+
+def box_muller(u):
+    """
+    Standard normals from uniforms in [0, 1), pairing consecutive columns
+    (the last axis must have even length).
+    """
+    u1, u2 = u[..., 0::2], u[..., 1::2]
+    radius = np.sqrt(-2.0 * np.log1p(-u1))
+    z = np.empty(u.shape)
+    z[..., 0::2] = radius * np.cos(2 * np.pi * u2)
+    z[..., 1::2] = radius * np.sin(2 * np.pi * u2)
+    return z
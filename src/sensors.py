@@ -0,0 +1,172 @@
+# src/sensors.py
+
+import numpy as np
+
+from sampling import SAMPLING, box_muller, scrambled_halton
+
+class GaussianNoiseSensor:
+    """
+    Pursuer state sensor with additive zero-mean Gaussian noise.
+    Position noise is always drawn; velocity noise only when vel_noise is set.
+    """
+    def __init__(self, pos_noise=0.0, vel_noise=None, rng=None):
+        self.pos_noise = pos_noise
+        self.vel_noise = vel_noise
+        # Default to the global np.random state, as the original scripts did
+        self.rng = rng if rng is not None else np.random
+
+    def measure(self, pos, vel):
+        meas_pos = pos + self.rng.normal(0, self.pos_noise, size=3)
+        if self.vel_noise is None:
+            return meas_pos, vel
+        meas_vel = vel + self.rng.normal(0, self.vel_noise, size=3)
+        return meas_pos, meas_vel
+
+class SpikeDisturbance:
+    """
+    Random acceleration spikes: with probability `prob` per step, a uniform
+    kick in [-magnitude, magnitude] on each axis.
+    """
+    def __init__(self, prob=0.05, magnitude=1.0, rng=None):
+        self.prob = prob
+        self.magnitude = magnitude
+        self.rng = rng if rng is not None else np.random
+
+    def sample(self):
+        if self.rng.random() < self.prob:
+            return self.rng.uniform(-self.magnitude, self.magnitude, size=3)
+        return None
+
+# --- Pre-drawn noise tapes ---
+def trial_rng(seed, trial):
+    """
+    Generator for one trial: the `trial`-th child of SeedSequence(seed).spawn(),
+    built directly so no other trial's stream has to be created.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(trial,)))
+
+def tape_from_variates(z, u, noise, vel_noise=None, prob=0.05, magnitude=1.0):
+    """
+    Map base variates to a tape: z (..., 6) standard normals become position
+    and velocity noise, u (..., 4) uniforms (or None for no spikes) become
+    spike events (u[..., 0] < prob) and kicks.
+    """
+    vel_noise = noise * 0.1 if vel_noise is None else vel_noise
+    tape = {"pos_noise": z[..., :3] * noise, "vel_noise": z[..., 3:] * vel_noise}
+    if u is None:
+        tape["spikes"] = np.zeros(z.shape[:-1] + (3,))
+    else:
+        hit = u[..., 0] < prob
+        tape["spikes"] = (2.0 * u[..., 1:] - 1.0) * (magnitude * hit[..., None])
+    return tape
+
+def draw_variates(rng, shape, disturbance=True):
+    """
+    Base variates for tape_from_variates: one normal and one uniform draw.
+    """
+    z = rng.standard_normal(shape + (6,))
+    u = rng.random(shape + (4,)) if disturbance else None
+    return z, u
+
+def draw_noise_tape(rng, shape, noise=0.1, vel_noise=None, disturbance=True, prob=0.05, magnitude=1.0):
+    """
+    Draw sensor noise and disturbance spikes for a whole run (or a batch of
+    runs) at once: one normal draw for all position/velocity noise and one
+    uniform draw for the spike events and kicks.
+    Args:
+        rng (np.random.Generator): Random source.
+        shape (tuple): Leading shape, e.g. (N,) for one run or (R, N) for R runs.
+        noise (float): Position noise stddev.
+        vel_noise (float or None): Velocity noise stddev (default: 0.1 * noise).
+        disturbance (bool): Draw spikes (otherwise the spike tape is zero).
+        prob, magnitude (float): Spike probability per step and per-axis bound.
+    Returns:
+        dict: pos_noise, vel_noise and spikes, each shape + (3,).
+    """
+    z, u = draw_variates(rng, tuple(shape), disturbance)
+    return tape_from_variates(z, u, noise, vel_noise, prob, magnitude)
+
+# Spawn key of the Halton scramble stream (trial streams use one-element keys)
+_SCRAMBLE_KEY = (0, 1)
+
+def draw_trial_tapes(seed, trials, N=400, noise=0.1, disturbance=True, sampling="random"):
+    """
+    Draw whole-run noise/disturbance tapes for the given trial indices.
+    Each trial's tape depends only on (seed, trial), so it does not depend
+    on which other trials share its batch, and any guidance law run on the
+    same (seed, trial) sees exactly the same noise (common random numbers).
+
+    Sampling strategies (see sampling.SAMPLING):
+      "random":     independent draws from trial_rng(seed, trial).
+      "antithetic": trials 2j and 2j+1 share trial_rng(seed, j); the odd
+                    trial negates the normals and reflects the uniforms
+                    (u -> 1 - u), so each pair's errors partly cancel.
+      "halton":     trial i is point i of a scrambled Halton sequence over
+                    all 10 * N tape inputs (normals via Box-Muller).
+    Every strategy gives each trial the same marginal distribution, so
+    trial averages stay unbiased.
+    Returns:
+        dict: pos_noise, vel_noise and spikes, each (len(trials), N, 3).
+    """
+    if sampling not in SAMPLING:
+        raise ValueError(f"Unknown sampling strategy: {sampling}")
+    if sampling == "halton":
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=_SCRAMBLE_KEY))
+        points = scrambled_halton(trials, 10 * N, rng).reshape(len(trials), N, 10)
+        u = points[..., 6:] if disturbance else None
+        return tape_from_variates(box_muller(points[..., :6]), u, noise, None, 0.05, 1.0)
+
+    R = len(trials)
+    tapes = {key: np.empty((R, N, 3)) for key in ("pos_noise", "vel_noise", "spikes")}
+    for k, trial in enumerate(trials):
+        if sampling == "antithetic":
+            z, u = draw_variates(trial_rng(seed, trial // 2), (N,), disturbance)
+            if trial % 2:
+                z, u = -z, (None if u is None else 1.0 - u)
+        else:
+            z, u = draw_variates(trial_rng(seed, trial), (N,), disturbance)
+        for key, value in tape_from_variates(z, u, noise, None, 0.05, 1.0).items():
+            tapes[key][k] = value
+    return tapes
+
+class TapeSensor:
+    """
+    Sensor replaying pre-drawn noise: the i-th measurement adds row i of
+    the tape. Drop-in for GaussianNoiseSensor in the Simulator, with
+    measurements written into reused buffers.
+    """
+    def __init__(self, pos_noise, vel_noise=None):
+        self.pos_noise = np.asarray(pos_noise, dtype=float)
+        self.vel_noise = None if vel_noise is None else np.asarray(vel_noise, dtype=float)
+        self.i = 0
+        self._pos = np.empty(3)
+        self._vel = np.empty(3)
+
+    def measure(self, pos, vel):
+        i = self.i
+        self.i += 1
+        meas_pos = np.add(pos, self.pos_noise[i], out=self._pos)
+        if self.vel_noise is None:
+            return meas_pos, vel
+        return meas_pos, np.add(vel, self.vel_noise[i], out=self._vel)
+
+class TapeDisturbance:
+    """
+    Disturbance replaying a pre-drawn (N, 3) spike tape (zero rows = no spike).
+    """
+    def __init__(self, spikes):
+        self.spikes = np.asarray(spikes, dtype=float)
+        self.i = 0
+
+    def sample(self):
+        spike = self.spikes[self.i]
+        self.i += 1
+        return spike if spike.any() else None
+
+def replay_tape(tapes, k=0):
+    """
+    (TapeSensor, TapeDisturbance) replaying row `k` of draw_trial_tapes output,
+    so a single Simulator run reproduces batch trial k's noise exactly.
+    """
+    return (TapeSensor(tapes["pos_noise"][k], tapes["vel_noise"][k]),
+            TapeDisturbance(tapes["spikes"][k]))
@@ -0,0 +1,164 @@
+# src/sim_cache.py
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+
+def code_version(*objects):
+    """
+    Hash of the source of the given modules/functions, so cached results are
+    invalidated when the simulation code changes.
+    """
+    h = hashlib.sha256()
+    for obj in objects:
+        path = inspect.getsourcefile(obj) if inspect.ismodule(obj) else None
+        if path is not None:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        else:
+            h.update(inspect.getsource(obj).encode())
+    return h.hexdigest()[:16]
+
+def _canonical(value):
+    # JSON-stable form: numpy scalars/arrays to Python, floats by repr
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if value is None:
+        return None
+    if isinstance(value, (np.bool_, bool)):
+        return bool(value)
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return repr(float(value))
+    return str(value)
+
+class SimCache:
+    """
+    Content-addressed on-disk cache of simulation results.
+
+    An entry is keyed on a SHA-256 of the function source, the code version
+    of the simulation modules, and the canonicalised parameters (including
+    the RNG seed), and holds a metrics dict plus optional named arrays
+    (e.g. trajectories) in one .npz file. Hits refresh the file's mtime;
+    once the directory exceeds max_bytes the least recently used entries
+    are deleted. Several processes may share a directory: an entry removed
+    by another process is simply a miss.
+    """
+    def __init__(self, directory=".sim_cache", max_bytes=256 * 2**20, modules=()):
+        """
+        Args:
+            directory (str): Cache location (created on the first store).
+            max_bytes (int): Size bound for all entries together.
+            modules (tuple): Modules whose source is part of every key.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = code_version(*modules)
+        self.hits = 0
+        self.misses = 0
+        self._fn_versions = {}
+
+    def key(self, fn, params):
+        """
+        Cache key for calling `fn` with `params` (dict, including any seed).
+        """
+        source = self._fn_versions.get(fn)
+        if source is None:
+            source = self._fn_versions[fn] = code_version(fn)
+        blob = json.dumps({"fn": fn.__qualname__, "source": source,
+                           "version": self.version, "params": _canonical(params)}, sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key):
+        """
+        Returns:
+            (dict, dict) or None: (metrics, arrays) for a hit, None for a miss.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                metrics = json.loads(str(data["__metrics__"]))
+                arrays = {name: data[name] for name in data.files if name != "__metrics__"}
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # Evicted by another process since the read
+        self.hits += 1
+        return metrics, arrays
+
+    def store(self, key, metrics, arrays=None):
+        """
+        Write an entry (atomically) and evict old entries beyond max_bytes.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, __metrics__=json.dumps(metrics, default=float), **(arrays or {}))
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue  # Removed by another process after the listing
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def memoize(self, fn=None, *, arrays=True):
+        """
+        Decorator for functions returning (metrics dict, arrays dict). Calls
+        are keyed on their bound arguments, defaults included; with
+        arrays=False only the metrics are kept (and returned).
+        """
+        if fn is None:
+            return functools.partial(self.memoize, arrays=arrays)
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = self.key(fn, bound.arguments)
+            hit = self.load(key)
+            if hit is not None:
+                return hit
+            metrics, result_arrays = fn(*args, **kwargs)
+            result_arrays = result_arrays if arrays else {}
+            self.store(key, metrics, result_arrays)
+            return metrics, result_arrays
+        return wrapper
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,410 @@
+# src/simulator.py
+
+import math
+
+import numpy as np
+
+from guidance import PurePursuitGuidance
+from metrics import closest_approach
+from trajectory_cache import target_tables
+
+class Simulator:
+    """
+    Discrete-time pursuit simulation (explicit Euler) writing into
+    preallocated trajectory buffers.
+
+    Acceleration per step:
+      - controller only: PD tracking of the target position.
+      - guidance only: the guidance command is applied as acceleration.
+      - guidance + controller: the controller tracks (position + command),
+        i.e. the command is treated as a desired velocity/offset. The
+        position is the sensed one by default, or the true one with
+        setpoint="true".
+      - guidance with command="velocity": the command is a desired
+        velocity, tracked with unit gain (acc = command - sensed_vel).
+    Then optional elementwise saturation (max_acc) and disturbance.
+
+    Early termination (off by default) uses the range after each step,
+    |pursuer(after step i) - target(t_i)|, like the Monte Carlo metrics.
+
+    Buffers:
+      traj_pursuer (N+1, 3): pursuer position before step 0 and after each step.
+      traj_target  (N+1, 3): target position at t = 0, dt, ..., N*dt.
+      target_vel   (N+1, 3): target velocity on the same grid.
+      acc_history  (N, 3):   applied acceleration per step.
+
+    step() writes the guidance/controller command straight into
+    acc_history and integrates through reused scratch vectors, so the
+    steady-state loop allocates no arrays (sensors and disturbances aside).
+    """
+    def __init__(self, target, guidance=None, controller=None, sensor=None, disturbance=None,
+                 dt=0.05, N=400, pursuer_pos=(-7.0, -7.0, 0.0), pursuer_vel=(0.0, 0.0, 0.0),
+                 max_acc=None, target_vel=None, cache=None,
+                 stop_on_capture=False, capture_radius=0.5, miss_window=None,
+                 setpoint="sensed", command="acceleration"):
+        """
+        Args:
+            target: Object with positions(t)/velocities(t) (see target.py),
+                a callable t -> position, or an object with update(dt)/get_state().
+            guidance: PurePursuitGuidance, ProportionalNavigationGuidance or None.
+            controller: PositionController or None.
+            sensor: Object with measure(pos, vel) -> (pos, vel), or None for truth.
+            disturbance: Object with sample() -> (3,) array or None, or None.
+            dt (float): Time step [s].
+            N (int): Number of steps.
+            pursuer_pos, pursuer_vel: Initial pursuer state.
+            max_acc (float or None): Elementwise acceleration clip.
+            target_vel: Callable t -> target velocity for PN. Default: the
+                target's velocities(t), else a forward difference of the
+                target buffer.
+            cache (TrajectoryCache or None): Cache for target tables (default:
+                the process-wide in-memory cache).
+            stop_on_capture (bool): Stop once range < capture_radius.
+            capture_radius (float): Capture distance [m].
+            miss_window (int or None): Stop once range has grown for this many
+                consecutive steps after closest approach.
+            setpoint (str): Position the controller offsets the guidance
+                command from, "sensed" or "true".
+            command (str): Meaning of the guidance command without a
+                controller, "acceleration" or "velocity".
+        """
+        if guidance is None and controller is None:
+            raise ValueError("Simulator needs a guidance law, a controller, or both")
+        if setpoint not in ("sensed", "true"):
+            raise ValueError(f"Unknown setpoint: {setpoint}")
+        if command not in ("acceleration", "velocity"):
+            raise ValueError(f"Unknown command mode: {command}")
+        if command == "velocity" and (guidance is None or controller is not None):
+            raise ValueError("Velocity commands need a guidance law and no controller")
+        self.target = target
+        self.guidance = guidance
+        self.controller = controller
+        self.sensor = sensor
+        self.disturbance = disturbance
+        self.dt = dt
+        self.N = N
+        self.max_acc = max_acc
+        self.target_vel_fn = target_vel
+        self.cache = cache
+        self.stop_on_capture = stop_on_capture
+        self.capture_radius = capture_radius
+        self.miss_window = miss_window
+        self.setpoint = setpoint
+        self.command = command
+        self.initial_pos = np.array(pursuer_pos, dtype=float)
+        self.initial_vel = np.array(pursuer_vel, dtype=float)
+
+        self.traj_pursuer = np.empty((N + 1, 3))
+        self.traj_target = np.empty((N + 1, 3))
+        self.target_vel = np.empty((N + 1, 3))
+        self.acc_history = np.empty((N, 3))
+        self._cmd = np.empty(3)
+        self._scratch = np.empty(3)
+        self.reset()
+
+    def reset(self):
+        """
+        Rewind the pursuer to t=0 and refill the target buffer.
+
+        Targets given as positions(t) or a callable restart at t=0.
+        Incremental targets (update/get_state) carry on from their current
+        state, so pass a fresh one to replay the same engagement.
+        """
+        self._reset_state()
+
+        t_grid = np.arange(self.N + 1) * self.dt
+        if hasattr(self.target, "positions"):
+            # Whole trajectory in one vectorized call, shared across runs
+            positions, velocities = target_tables(self.target, self.dt, self.N + 1, self.cache)
+            self.traj_target[:] = positions
+        elif callable(self.target):
+            for k, t in enumerate(t_grid):
+                self.traj_target[k] = self.target(t)
+        else:
+            # Incremental targets are advanced from their current state
+            for k in range(self.N + 1):
+                self.traj_target[k] = self.target.get_state()
+                self.target.update(self.dt)
+        # Starting range, so opening is only counted after the pursuer has closed in
+        self._prev_range = np.linalg.norm(self.initial_pos - self.traj_target[0])
+
+        if self.target_vel_fn is not None:
+            for k, t in enumerate(t_grid):
+                self.target_vel[k] = self.target_vel_fn(t)
+        elif hasattr(self.target, "velocities"):
+            self.target_vel[:] = velocities
+        else:
+            self.target_vel[:-1] = np.diff(self.traj_target, axis=0) / self.dt
+            self.target_vel[-1] = self.target_vel[-2]
+
+    def _reset_state(self):
+        self.i = 0
+        self.done = False
+        self._opening = 0
+        self._approached = False
+        self.pos = self.initial_pos.copy()
+        self.vel = self.initial_vel.copy()
+        self.traj_pursuer[0] = self.pos
+
+    def _acceleration(self, target, target_vel, out=None):
+        """
+        Sensor -> guidance/controller -> saturation -> disturbance.
+        """
+        if self.sensor is not None:
+            meas_pos, meas_vel = self.sensor.measure(self.pos, self.vel)
+        else:
+            meas_pos, meas_vel = self.pos, self.vel
+
+        acc = self._control(meas_pos, meas_vel, target, target_vel, out, self.pos)
+
+        if self.disturbance is not None:
+            spike = self.disturbance.sample()
+            if spike is not None:
+                acc += spike
+        return acc
+
+    def _control(self, meas_pos, meas_vel, target, target_vel, out=None, pos=None):
+        """
+        Guidance/controller command from sensed state, with saturation,
+        written into `out` (a new array when None). `pos` is the true
+        position, used with setpoint="true".
+        """
+        if out is None:
+            out = np.empty(3)
+        if self.guidance is None:
+            acc = self.controller.compute_acceleration(meas_pos, meas_vel, target, out=out)
+        else:
+            cmd = out if self.controller is None else self._cmd
+            if isinstance(self.guidance, PurePursuitGuidance):
+                self.guidance.compute_command(meas_pos, target, out=cmd)
+            else:
+                self.guidance.compute_command(meas_pos, meas_vel, target, target_vel, out=cmd)
+            if self.controller is None:
+                acc = cmd
+                if self.command == "velocity":
+                    acc -= meas_vel
+            else:
+                cmd += pos if self.setpoint == "true" else meas_pos
+                acc = self.controller.compute_acceleration(meas_pos, meas_vel, cmd, out=out)
+
+        if self.max_acc is not None:
+            np.minimum(acc, self.max_acc, out=acc)
+            np.maximum(acc, -self.max_acc, out=acc)
+        return acc
+
+    def step(self):
+        """
+        Advance one time step. Returns the applied acceleration.
+        """
+        i = self.i
+        if i >= self.N:
+            raise RuntimeError("Simulation already ran all N steps; call reset()")
+        target = self.traj_target[i]
+
+        acc = self._acceleration(target, self.target_vel[i], out=self.acc_history[i])
+
+        # Physics
+        scratch = self._scratch
+        np.multiply(acc, self.dt, out=scratch)
+        self.vel += scratch
+        np.multiply(self.vel, self.dt, out=scratch)
+        self.pos += scratch
+        self.traj_pursuer[i + 1] = self.pos
+        self.i += 1
+
+        if self.stop_on_capture or self.miss_window is not None:
+            np.subtract(self.pos, target, out=scratch)
+            self._check_termination(math.sqrt(scratch @ scratch))
+        return acc
+
+    def _check_termination(self, rng_to_target):
+        if self.stop_on_capture and rng_to_target < self.capture_radius:
+            self.done = True
+        if self.miss_window is not None:
+            closing = rng_to_target < self._prev_range
+            self._approached = self._approached or closing
+            self._opening = self._opening + 1 if (self._approached and not closing) else 0
+            self._prev_range = rng_to_target
+            if self._opening >= self.miss_window:
+                self.done = True
+
+    def run(self):
+        """
+        Run the remaining steps, or until early termination.
+        Returns:
+            (traj_pursuer (n+1, 3), traj_target (n, 3), acc_history (n, 3)),
+            where n = N unless the run stopped early.
+        """
+        while self.i < self.N and not self.done:
+            self.step()
+        n = self.i
+        return self.traj_pursuer[:n + 1], self.traj_target[:n], self.acc_history[:n]
+
+    def closest_approach(self):
+        """
+        Continuous CPA over the steps run so far, from same-instant pursuer
+        and target samples. Returns (cpa_time, cpa_distance).
+        """
+        n = self.i
+        return closest_approach(self.traj_pursuer[:n + 1], self.traj_target[:n + 1], self.dt)
+
+class AdaptiveSimulator(Simulator):
+    """
+    Simulator with an adaptive-step integrator: embedded Bogacki-Shampine
+    RK3(2) with error control, plus a range-based step cap.
+
+    The error estimate lets midcourse steps grow up to dt_max, and the cap
+    (step <= step_fraction * range / relative speed) shrinks them near
+    intercept so the terminal pass stays resolved. This reaches the same
+    miss distance as a fine fixed-step run with far fewer guidance and
+    controller evaluations.
+
+    Sensor noise and disturbance are sampled once per accepted step and held
+    over its stages. Their per-second rate therefore follows the step size.
+
+    Buffers start with room for t_final / dt_max steps and double when
+    full, so memory follows the steps actually taken rather than the
+    t_final / dt_min worst case. `times` holds the sample times.
+    step_count, rejected_steps and evaluations report the cost.
+    """
+    def __init__(self, target, t_final=20.0, dt_min=0.001, dt_max=0.5, step_fraction=0.05,
+                 rtol=1e-4, atol=1e-6, **kwargs):
+        """
+        Args:
+            target: Object with positions(t)/velocities(t) (see target.py).
+            t_final (float): Engagement duration [s].
+            dt_min, dt_max (float): Step size bounds [s].
+            step_fraction (float): Step cap as a fraction of range / relative speed.
+            rtol, atol (float): Local error tolerances on position and velocity.
+            **kwargs: Simulator options (guidance, controller, sensor, ...).
+        """
+        if not hasattr(target, "positions"):
+            raise ValueError("AdaptiveSimulator needs a target with positions(t)/velocities(t)")
+        self.t_final = t_final
+        self.dt_min = dt_min
+        self.dt_max = dt_max
+        self.step_fraction = step_fraction
+        self.rtol = rtol
+        self.atol = atol
+        capacity = int(np.ceil(t_final / dt_max))
+        self.times = np.empty(capacity + 1)
+        super().__init__(target, dt=dt_min, N=capacity, **kwargs)
+
+    @property
+    def step_count(self):
+        return self.i
+
+    def reset(self):
+        """
+        Rewind to t=0.
+        """
+        self._reset_state()
+        self.t = 0.0
+        self.h = self.dt_min
+        self.times[0] = 0.0
+        self.traj_target[0] = self.target.positions([0.0])[0]
+        self.target_vel[0] = self.target.velocities([0.0])[0]
+        self._prev_range = np.linalg.norm(self.initial_pos - self.traj_target[0])
+        self.rejected_steps = 0
+        self.evaluations = 0
+
+    def _grow(self):
+        # Double the step capacity, keeping the samples taken so far
+        self.N *= 2
+        for name in ("traj_pursuer", "traj_target", "target_vel", "times", "acc_history"):
+            old = getattr(self, name)
+            new = np.empty((self.N + (name != "acc_history"),) + old.shape[1:])
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _range_cap(self, i):
+        rng_to_target = np.linalg.norm(self.traj_target[i] - self.pos)
+        rel_speed = np.linalg.norm(self.target_vel[i] - self.vel)
+        if rel_speed < 1e-9:
+            return self.dt_max
+        return self.step_fraction * rng_to_target / rel_speed
+
+    def step(self):
+        """
+        Advance one accepted step. Returns the acceleration at its start.
+        """
+        i = self.i
+        if self.t >= self.t_final:
+            raise RuntimeError("Simulation already reached t_final; call reset()")
+        if i >= self.N:
+            self._grow()
+
+        # Noise and disturbance held over the step
+        pos_offset = vel_offset = 0.0
+        if self.sensor is not None:
+            meas_pos, meas_vel = self.sensor.measure(self.pos, self.vel)
+            pos_offset, vel_offset = meas_pos - self.pos, meas_vel - self.vel
+        spike = self.disturbance.sample() if self.disturbance is not None else None
+
+        def accel(p, v, tp, tv):
+            self.evaluations += 1
+            acc = self._control(p + pos_offset, v + vel_offset, tp, tv, pos=p)
+            return acc if spike is None else acc + spike
+
+        pos, vel = self.pos, self.vel
+        a1 = accel(pos, vel, self.traj_target[i], self.target_vel[i])
+        h = min(max(min(self.h, self._range_cap(i)), self.dt_min), self.dt_max, self.t_final - self.t)
+        while True:
+            t_stage = self.t + np.array([0.5, 0.75, 1.0]) * h
+            tp = self.target.positions(t_stage)
+            tv = self.target.velocities(t_stage)
+
+            p2, v2 = pos + 0.5 * h * vel, vel + 0.5 * h * a1
+            a2 = accel(p2, v2, tp[0], tv[0])
+            p3, v3 = pos + 0.75 * h * v2, vel + 0.75 * h * a2
+            a3 = accel(p3, v3, tp[1], tv[1])
+            new_pos = pos + h * (2 / 9 * vel + 1 / 3 * v2 + 4 / 9 * v3)
+            new_vel = vel + h * (2 / 9 * a1 + 1 / 3 * a2 + 4 / 9 * a3)
+            a4 = accel(new_pos, new_vel, tp[2], tv[2])
+
+            # Embedded 2nd-order error estimate
+            err_pos = h * (-5 / 72 * vel + 1 / 12 * v2 + 1 / 9 * v3 - 1 / 8 * new_vel)
+            err_vel = h * (-5 / 72 * a1 + 1 / 12 * a2 + 1 / 9 * a3 - 1 / 8 * a4)
+            scale_pos = self.atol + self.rtol * np.maximum(np.abs(pos), np.abs(new_pos))
+            scale_vel = self.atol + self.rtol * np.maximum(np.abs(vel), np.abs(new_vel))
+            err = max(np.max(np.abs(err_pos) / scale_pos), np.max(np.abs(err_vel) / scale_vel))
+
+            factor = 5.0 if err == 0 else min(5.0, max(0.2, 0.9 * err ** (-1 / 3)))
+            if err <= 1.0 or h <= self.dt_min:
+                break
+            self.rejected_steps += 1
+            h = max(h * factor, self.dt_min)
+
+        self.acc_history[i] = a1
+        self.pos, self.vel = new_pos, new_vel
+        self.t += h
+        self.h = h * factor
+        self.traj_pursuer[i + 1] = self.pos
+        self.times[i + 1] = self.t
+        self.traj_target[i + 1] = tp[2]
+        self.target_vel[i + 1] = tv[2]
+        self.i += 1
+
+        if self.stop_on_capture or self.miss_window is not None:
+            self._check_termination(np.linalg.norm(self.pos - self.traj_target[i + 1]))
+        return a1
+
+    def run(self):
+        """
+        Run until t_final or early termination.
+        Returns:
+            (times (n+1,), traj_pursuer (n+1, 3), traj_target (n+1, 3), acc_history (n, 3)),
+            with pursuer and target sampled at the same instants.
+        """
+        while self.t < self.t_final - 1e-12 and not self.done:
+            self.step()
+        n = self.i
+        return self.times[:n + 1], self.traj_pursuer[:n + 1], self.traj_target[:n + 1], self.acc_history[:n]
+
+    def closest_approach(self):
+        """
+        Continuous CPA over the (non-uniform) samples taken so far.
+        """
+        n = self.i
+        return closest_approach(self.traj_pursuer[:n + 1], self.traj_target[:n + 1],
+                                times=self.times[:n + 1])
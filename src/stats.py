@@ -0,0 +1,304 @@
+# src/stats.py
+
+import heapq
+
+import numpy as np
+
+class RunningStats:
+    """
+    Streaming count/mean/variance/min/max (Welford, with Chan's pairwise
+    update for batches and merges). NaN values are counted, not averaged.
+    """
+    def __init__(self):
+        self.count = 0
+        self.nan_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """
+        Fold a batch of observations into the running moments.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        nan = np.isnan(values)
+        self.nan_count += int(np.count_nonzero(nan))
+        values = values[~nan]
+        if len(values) == 0:
+            return
+        mean = values.mean()
+        self._combine(len(values), mean, np.sum((values - mean) ** 2), values.min(), values.max())
+
+    def merge(self, other):
+        """
+        Fold another RunningStats (e.g. from a worker) into this one.
+        """
+        self.nan_count += other.nan_count
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, n, mean, m2, vmin, vmax):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+def mean_interval(stats, z=1.96):
+    """
+    Normal-approximation CI (low, high) for the mean of a RunningStats.
+    """
+    if stats.count < 2:
+        return (np.nan, np.nan)
+    half = z * stats.std / np.sqrt(stats.count)
+    return (stats.mean - half, stats.mean + half)
+
+def wilson_interval(successes, n, z=1.96):
+    """
+    Wilson score interval (low, high) for a binomial proportion. Unlike the
+    normal approximation it stays inside [0, 1] and has sensible width when
+    no (or every) trial is a success.
+    """
+    if n == 0:
+        return (0.0, 1.0)
+    p = successes / n
+    denom = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    low = 0.0 if successes == 0 else float(center - half)
+    high = 1.0 if successes == n else float(center + half)
+    return (low, high)
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (merging t-digest with the k1 scale function).
+
+    Observations are held as weighted centroids; centroids are small near
+    the tails and large near the median, so extreme quantiles stay accurate
+    while memory is bounded by ~compression/2 centroids.
+    """
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return self.weights.sum()
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other):
+        if len(other.means):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cum = np.cumsum(weights)
+        total = cum[-1]
+        # Group by unit-width bins of k(q) = compression/(2 pi) * asin(2q - 1)
+        q = np.clip((cum - weights / 2) / total, 0.0, 1.0)
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) q in [0, 1] (NaN when empty).
+        """
+        q = np.asarray(q, dtype=float)
+        if len(self.means) == 0:
+            return np.full_like(q, np.nan)[()]
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.r_[0.0, centers, total]
+        values = np.r_[self.min, self.means, self.max]
+        return np.interp(q * total, ranks, values)[()]
+
+class TrialAggregator:
+    """
+    Constant-memory summary of Monte Carlo trial metrics: RunningStats and a
+    QuantileSketch per metric. Trials without an intercept (NaN
+    time_to_intercept) are counted as failures.
+    """
+    def __init__(self, metrics=("miss_distance", "time_to_intercept", "energy"), compression=200):
+        self.metrics = tuple(metrics)
+        self.stats = {m: RunningStats() for m in self.metrics}
+        self.sketches = {m: QuantileSketch(compression) for m in self.metrics}
+
+    @property
+    def trials(self):
+        stats = self.stats[self.metrics[0]]
+        return stats.count + stats.nan_count
+
+    @property
+    def failures(self):
+        return self.stats["time_to_intercept"].nan_count
+
+    def update(self, df):
+        """
+        Fold a chunk of trials (DataFrame or dict of arrays) into the summary.
+        """
+        for m in self.metrics:
+            self.stats[m].update(df[m])
+            self.sketches[m].update(df[m])
+        return self
+
+    def merge(self, other):
+        for m in self.metrics:
+            self.stats[m].merge(other.stats[m])
+            self.sketches[m].merge(other.sketches[m])
+        return self
+
+    def summary(self):
+        """
+        Returns:
+            dict: metric -> {count, mean, std, min, q1, median, q3, max}.
+        """
+        out = {}
+        for m in self.metrics:
+            s = self.stats[m]
+            q1, med, q3 = self.sketches[m].quantile([0.25, 0.5, 0.75])
+            out[m] = {"count": s.count, "mean": s.mean if s.count else np.nan, "std": s.std,
+                      "min": s.min if s.count else np.nan, "q1": q1, "median": med, "q3": q3,
+                      "max": s.max if s.count else np.nan}
+        return out
+
+    def boxplot_stats(self, metric, label=None, whis=1.5):
+        """
+        Matplotlib Axes.bxp() input for `metric`. Whiskers are the
+        whis*IQR fences clipped to the observed range.
+        """
+        q1, med, q3 = self.sketches[metric].quantile([0.25, 0.5, 0.75])
+        s = self.stats[metric]
+        iqr = q3 - q1
+        return {"label": label or metric, "med": med, "q1": q1, "q3": q3,
+                "mean": s.mean,
+                "whislo": max(s.min, q1 - whis * iqr),
+                "whishi": min(s.max, q3 + whis * iqr),
+                "fliers": []}
+
+class TopK:
+    """
+    The k largest (score, item) pairs seen so far, in a bounded min-heap:
+    memory is O(k) however many scores are pushed. Ties go to the larger
+    item, so the result does not depend on push order, and two TopKs
+    merge exactly.
+    """
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    def push(self, scores, items):
+        """
+        Offer a batch of scores (NaN counts as +inf) with their items.
+        """
+        scores = np.nan_to_num(np.asarray(scores, dtype=float).ravel(), nan=np.inf)
+        items = np.asarray(items).ravel()
+        if self.k <= 0:
+            return self
+        if len(scores) > self.k:
+            # Only the batch's own top k (ties to the larger item) can enter the heap
+            keep = np.lexsort((items, scores))[-self.k:]
+            scores, items = scores[keep], items[keep]
+        for entry in zip(scores.tolist(), items.tolist()):
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, entry)
+            elif entry > self.heap[0]:
+                heapq.heapreplace(self.heap, entry)
+        return self
+
+    def merge(self, other):
+        if other.heap:
+            scores, items = zip(*other.heap)
+            self.push(scores, items)
+        return self
+
+    def items(self):
+        """
+        [(score, item), ...], largest first.
+        """
+        return sorted(self.heap, reverse=True)
+
+def hash_uniform(seed, items):
+    """
+    Deterministic uniforms in [0, 1) for integer items (splitmix64 of
+    seed and item), cheap enough to key every trial of a large study.
+    """
+    x = np.asarray(items, dtype=np.uint64).ravel()
+    with np.errstate(over="ignore"):
+        x = x + np.full(x.shape, seed, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(float) * 2.0 ** -53
+
+class TrialRetainer:
+    """
+    Trial indices worth keeping trajectories for, in constant memory: the
+    k worst trials per metric (largest miss distance, energy and time to
+    intercept, with no intercept the worst), plus a uniform sample of
+    `reservoir` trials. The sample keeps the trials with the smallest
+    hash_uniform(seed, trial) keys (bottom-k sampling), so it is the same
+    for any chunking, order or worker count, and partial retainers merge.
+    """
+    def __init__(self, k=5, reservoir=20, metrics=("miss_distance", "energy", "time_to_intercept"), seed=0):
+        self.metrics = tuple(metrics)
+        self.seed = seed
+        self.worst = {m: TopK(k) for m in self.metrics}
+        self.sample = TopK(reservoir)
+
+    def update(self, df):
+        """
+        Offer a chunk of trials (with a `trial` column).
+        """
+        trials = np.asarray(df["trial"])
+        for m in self.metrics:
+            self.worst[m].push(df[m], trials)
+        self.sample.push(-hash_uniform(self.seed, trials), trials)
+        return self
+
+    def merge(self, other):
+        for m in self.metrics:
+            self.worst[m].merge(other.worst[m])
+        self.sample.merge(other.sample)
+        return self
+
+    def selections(self):
+        """
+        [(label, trial), ...]: "worst_<metric>" entries (worst first), then
+        "typical" entries.
+        """
+        out = [(f"worst_{m}", trial) for m in self.metrics for _, trial in self.worst[m].items()]
+        out += [("typical", trial) for _, trial in sorted(self.sample.items(), key=lambda e: e[1])]
+        return out
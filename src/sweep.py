@@ -0,0 +1,171 @@
+# src/sweep.py
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from sampling import scrambled_halton
+
+# --- Designs ---
+def factorial_design(**levels):
+    """
+    Full-factorial design: every combination of the given levels.
+    Example: factorial_design(kp=[1, 2], noise=[0.0, 0.1]) -> 4 points.
+    Returns:
+        list[dict]: One parameter dict per point.
+    """
+    names = list(levels)
+    return [dict(zip(names, combo)) for combo in itertools.product(*levels.values())]
+
+def latin_hypercube(n, seed=0, **ranges):
+    """
+    Latin-hypercube design with `n` points. Each parameter range is split
+    into n equal strata and every stratum is sampled exactly once.
+    Args:
+        n (int): Number of points.
+        seed (int): Seed for the stratum permutations and jitter.
+        **ranges: (low, high) tuple for a continuous parameter, or a list of
+            levels for a discrete one (strata are mapped onto the levels).
+    Returns:
+        list[dict]: One parameter dict per point.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, spec in ranges.items():
+        u = (rng.permutation(n) + rng.random(n)) / n
+        if isinstance(spec, tuple):
+            low, high = spec
+            columns[name] = low + u * (high - low)
+        else:
+            levels = list(spec)
+            columns[name] = [levels[k] for k in (u * len(levels)).astype(int)]
+    return [{name: _scalar(columns[name][i]) for name in ranges} for i in range(n)]
+
+def halton_design(n, seed=0, **ranges):
+    """
+    Quasi-random design: the first `n` points of a scrambled Halton
+    sequence, one dimension per parameter. Fills the space more evenly than
+    a random or Latin-hypercube sample of the same size (in every joint
+    projection, not just per parameter). Ranges are given as in
+    latin_hypercube.
+    Returns:
+        list[dict]: One parameter dict per point.
+    """
+    u = scrambled_halton(np.arange(n), len(ranges), np.random.default_rng(seed))
+    columns = {}
+    for j, (name, spec) in enumerate(ranges.items()):
+        if isinstance(spec, tuple):
+            low, high = spec
+            columns[name] = low + u[:, j] * (high - low)
+        else:
+            levels = list(spec)
+            columns[name] = [levels[k] for k in (u[:, j] * len(levels)).astype(int)]
+    return [{name: _scalar(columns[name][i]) for name in ranges} for i in range(n)]
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+# --- Timing ---
+class Timer:
+    """
+    Context manager recording wall (perf_counter) and CPU (process_time)
+    seconds spent in the block.
+    """
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._wall
+        self.cpu = time.process_time() - self._cpu
+        return False
+
+def _timed_call(fn, index, params):
+    with Timer() as timer:
+        metrics = fn(**params)
+    return index, metrics, timer.wall, timer.cpu
+
+# --- Scheduler ---
+def run_sweep(fn, points, workers=None, cost=None, skip=()):
+    """
+    Evaluate fn(**params) for every point over a process pool.
+
+    Points are submitted longest-first by `cost(params)` so the slowest
+    points do not straggle at the end, and results are yielded as soon as
+    each point finishes (completion order, not design order). Points of
+    equal cost keep their design order, so the default only reorders
+    designs that vary N.
+
+    Args:
+        fn: Picklable function returning a metrics dict.
+        points (list[dict]): Design points.
+        workers (int or None): Process count (default: os.cpu_count()); 1 runs in-process.
+        cost: Callable estimating a point's run time (default: its N, i.e.
+            steps, or 1 when the point does not set N).
+        skip: Point indices to leave out (e.g. already stored).
+    Yields:
+        dict: Point index, parameters, metrics, wall_time and cpu_time [s]
+            (CPU time is measured in the process that ran the point).
+    """
+    workers = workers or os.cpu_count() or 1
+    cost = cost or (lambda params: params.get("N", 1))
+    skip = set(skip)
+    order = sorted((i for i in range(len(points)) if i not in skip),
+                   key=lambda i: cost(points[i]), reverse=True)
+
+    def record(index, metrics, wall, cpu):
+        return {"point": index, **points[index], **metrics, "wall_time": wall, "cpu_time": cpu}
+
+    if workers == 1:
+        for i in order:
+            yield record(*_timed_call(fn, i, points[i]))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_timed_call, fn, i, points[i]) for i in order]
+        for future in as_completed(futures):
+            yield record(*future.result())
+
+def sweep_to_store(fn, points, store, workers=None, cost=None, flush_every=64):
+    """
+    run_sweep into a ResultStore, resuming from the points it already holds.
+
+    Records are buffered and flushed as contiguous [start, stop) point
+    ranges (at most `flush_every` rows each) so the store's manifest stays
+    valid whatever order points finish in.
+    Yields:
+        dict: Each new record as it finishes.
+    """
+    done = {i for start, stop in store.chunks for i in range(start, stop)}
+    pending = {}
+    start = 0
+
+    def flush(final=False):
+        nonlocal start
+        while start < len(points):
+            while start in done:
+                start += 1
+            stop = start
+            while stop in pending and stop - start < flush_every:
+                stop += 1
+            if stop == start or (stop - start < flush_every and not final
+                                 and stop < len(points) and stop not in done):
+                return
+            rows = [pending.pop(i) for i in range(start, stop)]
+            store.append(start, stop, {col: np.array([_nan_if_none(r[col]) for r in rows])
+                                       for col in rows[0]})
+            done.update(range(start, stop))
+            start = stop
+
+    for rec in run_sweep(fn, points, workers, cost, skip=done):
+        pending[rec["point"]] = rec
+        flush()
+        yield rec
+    flush(final=True)
+
+def _nan_if_none(value):
+    return np.nan if value is None else value
@@ -11,6 +11,7 @@ class TargetProfile:
         self.heading_vec = np.array(heading_vec, dtype=float)
         self.heading_vec /= np.linalg.norm(self.heading_vec)
         self.speed = speed
+        self.initial_position = self.position.copy()
 
     def update(self, dt):
         """
@@ -21,6 +22,28 @@ class TargetProfile:
     def get_state(self):
         return self.position.copy()
 
+    def cache_key(self):
+        """
+        Hashable key of the parameters that define positions()/velocities().
+        """
+        return ("TargetProfile", tuple(map(float, self.initial_position)),
+                tuple(map(float, self.heading_vec)), float(self.speed))
+
+    def positions(self, t):
+        """
+        Positions at times t (measured from construction), shape (len(t), dim).
+        """
+        t = np.asarray(t, dtype=float)
+        return self.initial_position + np.multiply.outer(t, self.heading_vec * self.speed)
+
+    def velocities(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.tile(self.heading_vec * self.speed, (t.size, 1))
+
+    def accelerations(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.zeros((t.size, self.heading_vec.size))
+
 class ConstantHeadingTarget:
     """
     Target moving with constant turn rate (circular/arc motion).
@@ -30,6 +53,8 @@ class ConstantHeadingTarget:
         self.heading = np.arctan2(heading_vec[1], heading_vec[0])
         self.speed = speed
         self.turn_rate = turn_rate  # radians per second
+        self.initial_position = self.position.copy()
+        self.initial_heading = self.heading
 
     def update(self, dt):
         """
@@ -43,3 +68,128 @@ class ConstantHeadingTarget:
     def get_state(self):
         return self.position.copy()
 
+    def cache_key(self):
+        return ("ConstantHeadingTarget", tuple(map(float, self.initial_position)),
+                float(self.initial_heading), float(self.speed), float(self.turn_rate))
+
+    def positions(self, t):
+        """
+        Exact arc positions at times t (measured from construction), shape
+        (len(t), dim). Differs from repeated update(dt) by O(dt), since
+        update() turns before moving.
+        """
+        t = np.asarray(t, dtype=float)
+        h0, w, v = self.initial_heading, self.turn_rate, self.speed
+        heading = h0 + w * t
+        out = np.tile(self.initial_position, (t.size, 1))
+        if abs(w) < 1e-12:
+            out[:, 0] += v * np.cos(h0) * t
+            out[:, 1] += v * np.sin(h0) * t
+        else:
+            out[:, 0] += v / w * (np.sin(heading) - np.sin(h0))
+            out[:, 1] -= v / w * (np.cos(heading) - np.cos(h0))
+        return out
+
+    def velocities(self, t):
+        t = np.asarray(t, dtype=float)
+        heading = self.initial_heading + self.turn_rate * t
+        out = np.zeros((t.size, self.initial_position.size))
+        out[:, 0] = self.speed * np.cos(heading)
+        out[:, 1] = self.speed * np.sin(heading)
+        return out
+
+    def accelerations(self, t):
+        t = np.asarray(t, dtype=float)
+        heading = self.initial_heading + self.turn_rate * t
+        out = np.zeros((t.size, self.initial_position.size))
+        out[:, 0] = -self.speed * self.turn_rate * np.sin(heading)
+        out[:, 1] = self.speed * self.turn_rate * np.cos(heading)
+        return out
+
+class HelicalTarget:
+    """
+    3D helical target: x = R cos(wt), y = R sin(wt), z = Vz t.
+    """
+    def __init__(self, radius=5, z_rate=0.2, speed=1.0):
+        self.radius = radius
+        self.z_rate = z_rate
+        self.speed = speed  # angular rate w [rad/s]
+        self.t = 0.0
+
+    def update(self, dt):
+        self.t += dt
+
+    def get_state(self):
+        return self.positions([self.t])[0]
+
+    def cache_key(self):
+        return ("HelicalTarget", float(self.radius), float(self.z_rate), float(self.speed))
+
+    def positions(self, t):
+        t = np.asarray(t, dtype=float)
+        wt = self.speed * t
+        return np.stack([self.radius * np.cos(wt),
+                         self.radius * np.sin(wt),
+                         self.z_rate * t], axis=-1)
+
+    def velocities(self, t):
+        t = np.asarray(t, dtype=float)
+        wt = self.speed * t
+        rw = self.radius * self.speed
+        return np.stack([-rw * np.sin(wt),
+                         rw * np.cos(wt),
+                         np.full_like(t, self.z_rate)], axis=-1)
+
+    def accelerations(self, t):
+        t = np.asarray(t, dtype=float)
+        wt = self.speed * t
+        rw2 = self.radius * self.speed**2
+        return np.stack([-rw2 * np.cos(wt),
+                         -rw2 * np.sin(wt),
+                         np.zeros_like(t)], axis=-1)
+
+class HelicalSwarm:
+    """
+    M helical targets evaluated together: target m follows
+    center[m] + (R cos(w t + phase), R sin(w t + phase), Vz t) with its own
+    radius, angular rate, climb rate and phase.
+    """
+    def __init__(self, centers, radius=5.0, z_rate=0.2, speed=1.0, phase=0.0):
+        self.centers = np.atleast_2d(np.asarray(centers, dtype=float))
+        M = len(self.centers)
+        self.radius = np.broadcast_to(np.asarray(radius, dtype=float), (M,)).copy()
+        self.z_rate = np.broadcast_to(np.asarray(z_rate, dtype=float), (M,)).copy()
+        self.speed = np.broadcast_to(np.asarray(speed, dtype=float), (M,)).copy()
+        self.phase = np.broadcast_to(np.asarray(phase, dtype=float), (M,)).copy()
+
+    @classmethod
+    def random(cls, M, extent=50.0, seed=0):
+        """
+        M helices with random centers in a cube of side `extent` and random
+        radius, rate and phase.
+        """
+        rng = np.random.default_rng(seed)
+        return cls(rng.uniform(-extent / 2, extent / 2, (M, 3)), radius=rng.uniform(2.0, 6.0, M),
+                   z_rate=rng.uniform(-0.3, 0.3, M), speed=rng.uniform(0.5, 1.5, M) * rng.choice([-1, 1], M),
+                   phase=rng.uniform(0, 2 * np.pi, M))
+
+    def __len__(self):
+        return len(self.centers)
+
+    def positions(self, t):
+        """
+        Positions of all targets at times t, shape t.shape + (M, 3).
+        """
+        t = np.asarray(t, dtype=float)[..., None]
+        wt = self.speed * t + self.phase
+        return self.centers + np.stack([self.radius * np.cos(wt),
+                                        self.radius * np.sin(wt),
+                                        self.z_rate * t], axis=-1)
+
+    def velocities(self, t):
+        t = np.asarray(t, dtype=float)[..., None]
+        wt = self.speed * t + self.phase
+        rw = self.radius * self.speed
+        return np.stack([-rw * np.sin(wt),
+                         rw * np.cos(wt),
+                         np.broadcast_to(self.z_rate, wt.shape)], axis=-1)
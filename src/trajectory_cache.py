@@ -0,0 +1,105 @@
+# src/trajectory_cache.py
+
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+class TrajectoryCache:
+    """
+    LRU-bounded cache of precomputed target position/velocity tables.
+
+    Tables are keyed on the target's cache_key() and the time grid (dt, N).
+    With a `directory`, each table is also written once as a .npy file and
+    opened with mmap_mode='r', so worker processes pointed at the same
+    directory share the OS page cache instead of receiving pickled arrays.
+    """
+    def __init__(self, maxsize=32, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self._tables = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, target, dt, N):
+        """
+        Position and velocity tables of `target` at t = 0, dt, ..., (N-1)*dt.
+        Args:
+            target: Object with positions(t), velocities(t) and cache_key().
+            dt (float): Time step [s].
+            N (int): Number of grid points.
+        Returns:
+            (np.array, np.array): Read-only (N, dim) positions and velocities.
+        """
+        key = (target.cache_key(), float(dt), int(N))
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            self.hits += 1
+            return table[0], table[1]
+
+        self.misses += 1
+        table = self._load_or_build(key, target, dt, N)
+        self._tables[key] = table
+        if len(self._tables) > self.maxsize:
+            self._tables.popitem(last=False)
+        return table[0], table[1]
+
+    def _load_or_build(self, key, target, dt, N):
+        path = None
+        if self.directory is not None:
+            digest = hashlib.sha1(repr(key).encode()).hexdigest()
+            path = os.path.join(self.directory, f"{digest}.npy")
+            if os.path.exists(path):
+                return np.load(path, mmap_mode="r")
+
+        t_grid = np.arange(N) * dt
+        table = np.stack([target.positions(t_grid), target.velocities(t_grid)])
+        if path is None:
+            table.flags.writeable = False
+            return table
+
+        # Write under a private name, then rename, so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, table)
+        os.replace(tmp_path, path)
+        return np.load(path, mmap_mode="r")
+
+    def clear(self):
+        self._tables.clear()
+
+# Process-wide caches, one per backing directory (None = in-memory only)
+_caches = {}
+
+def get_cache(directory=None, maxsize=32):
+    """
+    Shared TrajectoryCache for this process and backing directory.
+    """
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches[directory] = TrajectoryCache(maxsize=maxsize, directory=directory)
+    return cache
+
+def release_cache(directory=None):
+    """
+    Drop the process-wide cache for `directory`, closing its memory maps.
+    """
+    cache = _caches.pop(directory, None)
+    if cache is not None:
+        cache.clear()
+
+def target_tables(target, dt, N, cache=None):
+    """
+    Cached (positions, velocities) for `target`, or freshly computed tables
+    when the target does not provide cache_key().
+    """
+    if not hasattr(target, "cache_key"):
+        t_grid = np.arange(N) * dt
+        return target.positions(t_grid), target.velocities(t_grid)
+    if cache is None:
+        cache = get_cache()
+    return cache.get(target, dt, N)
@@ -1,54 +1,35 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
-import time
 import os
+import sys
 from position_controller import PositionController
-
-# --- Target trajectory ---
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
+from sensors import GaussianNoiseSensor, SpikeDisturbance
+from result_store import ResultStore
+from sim_cache import SimCache
+from simulator import Simulator
+from sweep import Timer, factorial_design, halton_design, latin_hypercube, sweep_to_store
+from target import HelicalTarget
+
+# Memoized sweep points; keys include the simulation modules' source
+sim_cache = SimCache(os.environ.get("SIM_CACHE_DIR", ".sim_cache"),
+                     modules=[sys.modules[cls.__module__] for cls in
+                              (Simulator, PositionController, GaussianNoiseSensor, HelicalTarget)])
 
 # --- Run single simulation ---
-def run_sim(kp=2.0, kd=1.0, noise=0.0, max_acc=None, disturbance=False, N=400, dt=0.05, capture_radius=0.5):
-    pursuer_pos = np.array([-7.0, -7.0, 0.0])
-    pursuer_vel = np.zeros(3)
-    controller = PositionController(kp, kd, max_acc=max_acc if max_acc else 100)
-    traj_pursuer = [pursuer_pos.copy()]
-    traj_target = []
-    acc_history = []
-
-    for i in range(N):
-        t = i * dt
-        target = helical_target(t)
-        traj_target.append(target.copy())
-
-        # Add noise to sensor
-        pos_noise = np.random.normal(0, noise, size=3)
-        current_pos = pursuer_pos + pos_noise
-
-        # Control
-        acc = controller.compute_acceleration(current_pos, pursuer_vel, target)
-        if max_acc:
-            acc = np.clip(acc, -max_acc, max_acc)
-
-        # Random disturbance (spikes)
-        if disturbance and np.random.rand() < 0.05:
-            acc += np.random.uniform(-1, 1, size=3)
-
-        acc_history.append(acc.copy())
+def run_sim(kp=2.0, kd=1.0, noise=0.0, max_acc=None, disturbance=False, N=400, dt=0.05, capture_radius=0.5, seed=0):
+    metrics, arrays = _simulate_metrics(kp, kd, noise, max_acc, disturbance, N, dt, capture_radius, seed)
+    return arrays["traj_pursuer"], arrays["traj_target"], metrics
 
-        # Physics
-        pursuer_vel += acc * dt
-        pursuer_pos += pursuer_vel * dt
-        traj_pursuer.append(pursuer_pos.copy())
-
-    traj_pursuer = np.array(traj_pursuer)
-    traj_target = np.array(traj_target)
-    acc_history = np.array(acc_history)
+@sim_cache.memoize
+def _simulate_metrics(kp, kd, noise, max_acc, disturbance, N, dt, capture_radius, seed):
+    rng = np.random.default_rng(seed)
+    controller = PositionController(kp, kd, max_acc=max_acc if max_acc else 100)
+    sim = Simulator(HelicalTarget(), controller=controller,
+                    sensor=GaussianNoiseSensor(noise, rng=rng),
+                    disturbance=SpikeDisturbance(rng=rng) if disturbance else None,
+                    dt=dt, N=N, max_acc=max_acc if max_acc else None)
+    traj_pursuer, traj_target, acc_history = sim.run()
 
     # Metrics
     distances = np.linalg.norm(traj_pursuer[:len(traj_target)] - traj_target, axis=1)
@@ -65,96 +46,92 @@ def run_sim(kp=2.0, kd=1.0, noise=0.0, max_acc=None, disturbance=False, N=400, d
 
     energy = np.sum(np.linalg.norm(acc_history, axis=1)**2) * dt
 
-    return traj_pursuer, traj_target, {
+    return {
         'time_to_intercept': time_to_intercept,
         'miss_distance': min_dist,
         'settling_time': settling_time,
         'energy': energy
-    }
-
-# --- Sweeps ---
-
-results = []
-outdir = "../doc" if os.path.isdir("../doc") else "./doc"
-os.makedirs(outdir, exist_ok=True)
-
-def record_and_print(label, metrics, extras=None):
-    metrics_dict = dict(metrics)
-    if extras:
-        metrics_dict.update(extras)
-    print(f"{label} -> {metrics_dict}")
-    results.append(metrics_dict)
-
-# Gain sweep
-for kp in [1.0, 2.0, 4.0]:
-    start = time.time()
-    _, _, metrics = run_sim(kp=kp, kd=1.0)
-    cpu_time = time.time() - start
-    record_and_print(f"[Gain Sweep] Kp={kp}, Kd=1.0", metrics, {"type": "Gain", "Kp": kp, "Kd": 1.0, "cpu_time": cpu_time})
-
-# Noise sweep
-for noise in [0.0, 0.1, 0.3]:
-    start = time.time()
-    _, _, metrics = run_sim(noise=noise)
-    cpu_time = time.time() - start
-    record_and_print(f"[Noise Sweep] σ={noise}", metrics, {"type": "Noise", "noise": noise, "cpu_time": cpu_time})
-
-# Actuator limit sweep
-for max_acc in [1.0, 2.0, 3.0]:
-    start = time.time()
-    _, _, metrics = run_sim(max_acc=max_acc)
-    cpu_time = time.time() - start
-    record_and_print(f"[Actuator Limit] max_acc={max_acc}", metrics, {"type": "Actuator", "max_acc": max_acc, "cpu_time": cpu_time})
-
-# Disturbance test
-for disturbance in [False, True]:
-    start = time.time()
-    _, _, metrics = run_sim(disturbance=disturbance)
-    cpu_time = time.time() - start
-    record_and_print(f"[Disturbance] {disturbance}", metrics, {"type": "Disturbance", "disturbance": disturbance, "cpu_time": cpu_time})
-
-# Save as DataFrame
-df = pd.DataFrame(results)
-df.to_csv(os.path.join(outdir, "tuning_robustness_metrics.csv"), index=False)
-
-# --- Plot Bar Charts ---
-def plot_bar(metric, group, x_label, y_label, fname):
-    subset = df[df["type"] == group]
-    if group == "Gain":
-        x = subset["Kp"].astype(str)
-    elif group == "Noise":
-        x = subset["noise"].astype(str)
-    elif group == "Actuator":
-        x = subset["max_acc"].astype(str)
-    elif group == "Disturbance":
-        x = subset["disturbance"].astype(str)
-    else:
-        x = np.arange(len(subset))
-    y = subset[metric].astype(float)
-    plt.figure(figsize=(6,4))
-    plt.bar(x, y)
-    plt.xlabel(x_label)
-    plt.ylabel(y_label)
-    plt.title(f"{y_label} vs {x_label} ({group})")
-    plt.tight_layout()
-    plt.savefig(os.path.join(outdir, fname))
-    plt.close()
-
-plot_bar("miss_distance", "Gain", "Kp", "Miss Distance (m)", "miss_distance_vs_gain.png")
-plot_bar("energy", "Gain", "Kp", "Energy Used", "energy_vs_gain.png")
-plot_bar("miss_distance", "Noise", "Noise σ", "Miss Distance (m)", "miss_distance_vs_noise.png")
-plot_bar("miss_distance", "Actuator", "Max Acc", "Miss Distance (m)", "miss_distance_vs_maxacc.png")
-plot_bar("energy", "Actuator", "Max Acc", "Energy Used", "energy_vs_maxacc.png")
-plot_bar("miss_distance", "Disturbance", "Disturbance", "Miss Distance (m)", "miss_distance_vs_disturbance.png")
-
-print("\nAll experiments complete. Plots saved to /doc and metrics to tuning_robustness_metrics.csv")
-
-import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-import time
-
-from position_controller import PositionController  # adjust import if your class is elsewhere
+    }, {"traj_pursuer": traj_pursuer, "traj_target": traj_target}
+
+def sweep_point(**params):
+    """
+    Metrics for one joint-sweep point (run_sim keyword arguments).
+    """
+    _, _, metrics = run_sim(**params)
+    return metrics
+
+# --- One-at-a-time sweeps ---
+def one_at_a_time_sweeps():
+    results = []
+    outdir = "../doc" if os.path.isdir("../doc") else "./doc"
+    os.makedirs(outdir, exist_ok=True)
+
+    def record_and_print(label, metrics, extras=None):
+        metrics_dict = dict(metrics)
+        if extras:
+            metrics_dict.update(extras)
+        print(f"{label} -> {metrics_dict}")
+        results.append(metrics_dict)
+
+    # Gain sweep
+    for kp in [1.0, 2.0, 4.0]:
+        with Timer() as timer:
+            _, _, metrics = run_sim(kp=kp, kd=1.0)
+        record_and_print(f"[Gain Sweep] Kp={kp}, Kd=1.0", metrics, {"type": "Gain", "Kp": kp, "Kd": 1.0, "wall_time": timer.wall, "cpu_time": timer.cpu})
+
+    # Noise sweep
+    for noise in [0.0, 0.1, 0.3]:
+        with Timer() as timer:
+            _, _, metrics = run_sim(noise=noise)
+        record_and_print(f"[Noise Sweep] σ={noise}", metrics, {"type": "Noise", "noise": noise, "wall_time": timer.wall, "cpu_time": timer.cpu})
+
+    # Actuator limit sweep
+    for max_acc in [1.0, 2.0, 3.0]:
+        with Timer() as timer:
+            _, _, metrics = run_sim(max_acc=max_acc)
+        record_and_print(f"[Actuator Limit] max_acc={max_acc}", metrics, {"type": "Actuator", "max_acc": max_acc, "wall_time": timer.wall, "cpu_time": timer.cpu})
+
+    # Disturbance test
+    for disturbance in [False, True]:
+        with Timer() as timer:
+            _, _, metrics = run_sim(disturbance=disturbance)
+        record_and_print(f"[Disturbance] {disturbance}", metrics, {"type": "Disturbance", "disturbance": disturbance, "wall_time": timer.wall, "cpu_time": timer.cpu})
+
+    # Save as DataFrame
+    df = pd.DataFrame(results)
+    df.to_csv(os.path.join(outdir, "tuning_robustness_metrics.csv"), index=False)
+
+    # --- Plot Bar Charts ---
+    def plot_bar(metric, group, x_label, y_label, fname):
+        subset = df[df["type"] == group]
+        if group == "Gain":
+            x = subset["Kp"].astype(str)
+        elif group == "Noise":
+            x = subset["noise"].astype(str)
+        elif group == "Actuator":
+            x = subset["max_acc"].astype(str)
+        elif group == "Disturbance":
+            x = subset["disturbance"].astype(str)
+        else:
+            x = np.arange(len(subset))
+        y = subset[metric].astype(float)
+        plt.figure(figsize=(6,4))
+        plt.bar(x, y)
+        plt.xlabel(x_label)
+        plt.ylabel(y_label)
+        plt.title(f"{y_label} vs {x_label} ({group})")
+        plt.tight_layout()
+        plt.savefig(os.path.join(outdir, fname))
+        plt.close()
+
+    plot_bar("miss_distance", "Gain", "Kp", "Miss Distance (m)", "miss_distance_vs_gain.png")
+    plot_bar("energy", "Gain", "Kp", "Energy Used", "energy_vs_gain.png")
+    plot_bar("miss_distance", "Noise", "Noise σ", "Miss Distance (m)", "miss_distance_vs_noise.png")
+    plot_bar("miss_distance", "Actuator", "Max Acc", "Miss Distance (m)", "miss_distance_vs_maxacc.png")
+    plot_bar("energy", "Actuator", "Max Acc", "Energy Used", "energy_vs_maxacc.png")
+    plot_bar("miss_distance", "Disturbance", "Disturbance", "Miss Distance (m)", "miss_distance_vs_disturbance.png")
+
+    print("\nAll experiments complete. Plots saved to /doc and metrics to tuning_robustness_metrics.csv")
 
 # --- Settling time & Time-to-Intercept ---
 def compute_settling_time(distances, dt, tol=1.0, duration=1.0):
@@ -168,155 +145,174 @@ def compute_time_to_intercept(distances, dt, tol=1.0):
     indices = np.where(distances < tol)[0]
     return float(indices[0] * dt) if len(indices) > 0 else None
 
-# --- Simulated target (3D helix) ---
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
-
 # --- Simulation runner ---
-def run_sim(kp=2.0, kd=1.0, noise=0.0, max_acc=None, disturbance=False, N=400, dt=0.05):
-    pursuer_pos = np.array([-7.0, -7.0, 0.0])
-    pursuer_vel = np.zeros(3)
-    traj_pursuer = [pursuer_pos.copy()]
-    traj_target = []
-    controller = PositionController(kp, kd, max_acc if max_acc else 10.0)
-
-    for i in range(N):
-        t = i * dt
-        target = helical_target(t)
-        traj_target.append(target.copy())
-
-        # Add sensor noise
-        pos_noise = np.random.normal(0, noise, size=3)
-        current_pos = pursuer_pos + pos_noise
+def run_sim_distances(kp=2.0, kd=1.0, noise=0.0, max_acc=None, disturbance=False, N=400, dt=0.05, seed=0):
+    _, arrays = _simulate_distances(kp, kd, noise, max_acc, disturbance, N, dt, seed)
+    return arrays["traj_pursuer"], arrays["traj_target"], arrays["distances"]
 
-        # Control (desired acc)
-        acc = controller.compute_acceleration(current_pos, pursuer_vel, target)
-
-        # Actuator saturation (redundant if max_acc in controller)
-        if max_acc is not None:
-            acc = np.clip(acc, -max_acc, max_acc)
-
-        # Optional: Random disturbance (spikes)
-        if disturbance and np.random.rand() < 0.05:
-            acc += np.random.uniform(-1, 1, size=3)
-
-        # Physics update
-        pursuer_vel += acc * dt
-        pursuer_pos += pursuer_vel * dt
-        traj_pursuer.append(pursuer_pos.copy())
+@sim_cache.memoize
+def _simulate_distances(kp, kd, noise, max_acc, disturbance, N, dt, seed):
+    rng = np.random.default_rng(seed)
+    controller = PositionController(kp, kd, max_acc if max_acc else 10.0)
 
-    traj_pursuer = np.array(traj_pursuer)
-    traj_target = np.array(traj_target)
+    # Actuator saturation via max_acc (redundant if max_acc in controller)
+    sim = Simulator(HelicalTarget(), controller=controller,
+                    sensor=GaussianNoiseSensor(noise, rng=rng),
+                    disturbance=SpikeDisturbance(rng=rng) if disturbance else None,
+                    dt=dt, N=N, max_acc=max_acc)
+    traj_pursuer, traj_target, _ = sim.run()
     min_len = min(len(traj_pursuer), len(traj_target))
     distances = np.linalg.norm(traj_pursuer[:min_len] - traj_target[:min_len], axis=1)
-    return traj_pursuer, traj_target, distances
+    return {}, {"traj_pursuer": traj_pursuer, "traj_target": traj_target, "distances": distances}
 
 # --- Experiments ---
-dt = 0.05
-N = 400
-
-all_metrics = []
-
-# Gain sweep
-for kp in [1.0, 2.0, 4.0]:
-    start = time.time()
-    _, _, distances = run_sim(kp=kp, kd=1.0, N=N, dt=dt)
-    cpu = time.time() - start
-    settling_time = compute_settling_time(distances, dt)
-    time_to_intercept = compute_time_to_intercept(distances, dt)
-    metrics = {
-        "type": "Gain",
-        "Kp": kp,
-        "Kd": 1.0,
-        "miss_distance": float(distances[-1]),
-        "settling_time": settling_time,
-        "time_to_intercept": time_to_intercept,
-        "energy": float(np.sum(distances) * dt),
-        "cpu_time": cpu,
-    }
-    print(f"[Gain Sweep] Kp={kp}, Kd=1.0 -> {metrics}")
-    all_metrics.append(metrics)
-
-# Noise sweep
-for noise in [0.0, 0.1, 0.3]:
-    start = time.time()
-    _, _, distances = run_sim(kp=2.0, kd=1.0, noise=noise, N=N, dt=dt)
-    cpu = time.time() - start
-    settling_time = compute_settling_time(distances, dt)
-    time_to_intercept = compute_time_to_intercept(distances, dt)
-    metrics = {
-        "type": "Noise",
-        "noise": noise,
-        "miss_distance": float(distances[-1]),
-        "settling_time": settling_time,
-        "time_to_intercept": time_to_intercept,
-        "energy": float(np.sum(distances) * dt),
-        "cpu_time": cpu,
-    }
-    print(f"[Noise Sweep] σ={noise} -> {metrics}")
-    all_metrics.append(metrics)
-
-# Actuator limit sweep
-for max_acc in [1.0, 2.0, 3.0]:
-    start = time.time()
-    _, _, distances = run_sim(kp=2.0, kd=1.0, max_acc=max_acc, N=N, dt=dt)
-    cpu = time.time() - start
-    settling_time = compute_settling_time(distances, dt)
-    time_to_intercept = compute_time_to_intercept(distances, dt)
-    metrics = {
-        "type": "Actuator",
-        "max_acc": max_acc,
-        "miss_distance": float(distances[-1]),
-        "settling_time": settling_time,
-        "time_to_intercept": time_to_intercept,
-        "energy": float(np.sum(distances) * dt),
-        "cpu_time": cpu,
-    }
-    print(f"[Actuator Limit] max_acc={max_acc} -> {metrics}")
-    all_metrics.append(metrics)
-
-# Disturbance test
-for disturbance in [False, True]:
-    start = time.time()
-    _, _, distances = run_sim(kp=2.0, kd=1.0, disturbance=disturbance, N=N, dt=dt)
-    cpu = time.time() - start
-    settling_time = compute_settling_time(distances, dt)
-    time_to_intercept = compute_time_to_intercept(distances, dt)
-    metrics = {
-        "type": "Disturbance",
-        "disturbance": disturbance,
-        "miss_distance": float(distances[-1]),
-        "settling_time": settling_time,
-        "time_to_intercept": time_to_intercept,
-        "energy": float(np.sum(distances) * dt),
-        "cpu_time": cpu,
-    }
-    print(f"[Disturbance] {disturbance} -> {metrics}")
-    all_metrics.append(metrics)
-
-# Save results
-df = pd.DataFrame(all_metrics)
-df.to_csv("tuning_robustness_metrics.csv", index=False)
-
-# Quick bar plots for each group
-def plot_metric(group, xkey, ykey, title, xlabel, ylabel, filename):
-    subset = df[df['type'] == group]
-    plt.figure(figsize=(6, 4))
-    plt.bar(subset[xkey].astype(str), subset[ykey])
-    plt.title(title)
-    plt.xlabel(xlabel)
-    plt.ylabel(ylabel)
-    plt.tight_layout()
-    plt.savefig(f"doc/{filename}")
-    plt.close()
-
-plot_metric('Gain', 'Kp', 'miss_distance', 'Miss Distance vs Gain', 'Kp', 'Miss Distance (m)', 'miss_distance_vs_gain.png')
-plot_metric('Noise', 'noise', 'miss_distance', 'Miss Distance vs Noise', 'Noise σ', 'Miss Distance (m)', 'miss_distance_vs_noise.png')
-plot_metric('Actuator', 'max_acc', 'miss_distance', 'Miss Distance vs Actuator Limit', 'Max Acc (m/s²)', 'Miss Distance (m)', 'miss_distance_vs_maxacc.png')
-plot_metric('Disturbance', 'disturbance', 'miss_distance', 'Miss Distance vs Disturbance', 'Disturbance', 'Miss Distance (m)', 'miss_distance_vs_disturbance.png')
-
-print("\nAll experiments complete. Plots saved to /doc and metrics to tuning_robustness_metrics.csv")
-
+def distance_sweeps():
+    dt = 0.05
+    N = 400
+
+    all_metrics = []
+
+    # Gain sweep
+    for kp in [1.0, 2.0, 4.0]:
+        with Timer() as timer:
+            _, _, distances = run_sim_distances(kp=kp, kd=1.0, N=N, dt=dt)
+        settling_time = compute_settling_time(distances, dt)
+        time_to_intercept = compute_time_to_intercept(distances, dt)
+        metrics = {
+            "type": "Gain",
+            "Kp": kp,
+            "Kd": 1.0,
+            "miss_distance": float(distances[-1]),
+            "settling_time": settling_time,
+            "time_to_intercept": time_to_intercept,
+            "energy": float(np.sum(distances) * dt),
+            "wall_time": timer.wall,
+            "cpu_time": timer.cpu,
+        }
+        print(f"[Gain Sweep] Kp={kp}, Kd=1.0 -> {metrics}")
+        all_metrics.append(metrics)
+
+    # Noise sweep
+    for noise in [0.0, 0.1, 0.3]:
+        with Timer() as timer:
+            _, _, distances = run_sim_distances(kp=2.0, kd=1.0, noise=noise, N=N, dt=dt)
+        settling_time = compute_settling_time(distances, dt)
+        time_to_intercept = compute_time_to_intercept(distances, dt)
+        metrics = {
+            "type": "Noise",
+            "noise": noise,
+            "miss_distance": float(distances[-1]),
+            "settling_time": settling_time,
+            "time_to_intercept": time_to_intercept,
+            "energy": float(np.sum(distances) * dt),
+            "wall_time": timer.wall,
+            "cpu_time": timer.cpu,
+        }
+        print(f"[Noise Sweep] σ={noise} -> {metrics}")
+        all_metrics.append(metrics)
+
+    # Actuator limit sweep
+    for max_acc in [1.0, 2.0, 3.0]:
+        with Timer() as timer:
+            _, _, distances = run_sim_distances(kp=2.0, kd=1.0, max_acc=max_acc, N=N, dt=dt)
+        settling_time = compute_settling_time(distances, dt)
+        time_to_intercept = compute_time_to_intercept(distances, dt)
+        metrics = {
+            "type": "Actuator",
+            "max_acc": max_acc,
+            "miss_distance": float(distances[-1]),
+            "settling_time": settling_time,
+            "time_to_intercept": time_to_intercept,
+            "energy": float(np.sum(distances) * dt),
+            "wall_time": timer.wall,
+            "cpu_time": timer.cpu,
+        }
+        print(f"[Actuator Limit] max_acc={max_acc} -> {metrics}")
+        all_metrics.append(metrics)
+
+    # Disturbance test
+    for disturbance in [False, True]:
+        with Timer() as timer:
+            _, _, distances = run_sim_distances(kp=2.0, kd=1.0, disturbance=disturbance, N=N, dt=dt)
+        settling_time = compute_settling_time(distances, dt)
+        time_to_intercept = compute_time_to_intercept(distances, dt)
+        metrics = {
+            "type": "Disturbance",
+            "disturbance": disturbance,
+            "miss_distance": float(distances[-1]),
+            "settling_time": settling_time,
+            "time_to_intercept": time_to_intercept,
+            "energy": float(np.sum(distances) * dt),
+            "wall_time": timer.wall,
+            "cpu_time": timer.cpu,
+        }
+        print(f"[Disturbance] {disturbance} -> {metrics}")
+        all_metrics.append(metrics)
+
+    # Save results
+    df = pd.DataFrame(all_metrics)
+    df.to_csv("tuning_robustness_metrics.csv", index=False)
+
+    # Quick bar plots for each group
+    def plot_metric(group, xkey, ykey, title, xlabel, ylabel, filename):
+        subset = df[df['type'] == group]
+        plt.figure(figsize=(6, 4))
+        plt.bar(subset[xkey].astype(str), subset[ykey])
+        plt.title(title)
+        plt.xlabel(xlabel)
+        plt.ylabel(ylabel)
+        plt.tight_layout()
+        plt.savefig(f"doc/{filename}")
+        plt.close()
+
+    plot_metric('Gain', 'Kp', 'miss_distance', 'Miss Distance vs Gain', 'Kp', 'Miss Distance (m)', 'miss_distance_vs_gain.png')
+    plot_metric('Noise', 'noise', 'miss_distance', 'Miss Distance vs Noise', 'Noise σ', 'Miss Distance (m)', 'miss_distance_vs_noise.png')
+    plot_metric('Actuator', 'max_acc', 'miss_distance', 'Miss Distance vs Actuator Limit', 'Max Acc (m/s²)', 'Miss Distance (m)', 'miss_distance_vs_maxacc.png')
+    plot_metric('Disturbance', 'disturbance', 'miss_distance', 'Miss Distance vs Disturbance', 'Disturbance', 'Miss Distance (m)', 'miss_distance_vs_disturbance.png')
+
+    print("\nAll experiments complete. Plots saved to /doc and metrics to tuning_robustness_metrics.csv")
+
+# --- Joint sweep ---
+def joint_sweep(design="factorial", lhs_points=200, seed=0, workers=None):
+    """
+    Joint sweep over kp x kd x noise x max_acc x disturbance on a process
+    pool, checkpointed to a ResultStore (rerunning resumes).
+    Args:
+        design (str): "factorial" (3 levels per parameter), "lhs" or "halton".
+        lhs_points (int): Points in the Latin-hypercube or Halton design.
+        seed (int): Seed for the LHS permutations or Halton scramble.
+        workers (int or None): Process count (default: os.cpu_count()).
+    Returns:
+        pd.DataFrame: One row per point.
+    """
+    if design == "factorial":
+        points = factorial_design(kp=[1.0, 2.0, 4.0], kd=[0.5, 1.0, 2.0], noise=[0.0, 0.1, 0.3],
+                                  max_acc=[1.0, 2.0, 3.0], disturbance=[False, True])
+    elif design == "lhs":
+        points = latin_hypercube(lhs_points, seed=seed, kp=(0.5, 5.0), kd=(0.2, 3.0), noise=(0.0, 0.3),
+                                 max_acc=(1.0, 3.0), disturbance=[False, True])
+    elif design == "halton":
+        points = halton_design(lhs_points, seed=seed, kp=(0.5, 5.0), kd=(0.2, 3.0), noise=(0.0, 0.3),
+                               max_acc=(1.0, 3.0), disturbance=[False, True])
+    else:
+        raise ValueError(f"Unknown design: {design}")
+
+    outdir = "../doc" if os.path.isdir("../doc") else "./doc"
+    store = ResultStore(os.path.join(outdir, f"tuning_sweep_{design}"), meta={"points": points})
+    point_cpu = 0.0
+    remaining = len(points) - len(store)
+    # Every point runs the same N steps at about the same cost, so no cost
+    # estimate is passed and points are submitted in design order
+    with Timer() as total:
+        for done, rec in enumerate(sweep_to_store(sweep_point, points, store, workers), 1):
+            point_cpu += rec["cpu_time"]
+            print(f"[{design} {done}/{remaining}] point {rec['point']}: "
+                  f"miss={rec['miss_distance']:.3f} wall={rec['wall_time']:.3f}s cpu={rec['cpu_time']:.3f}s")
+    print(f"Joint {design} sweep: {len(points)} points, wall {total.wall:.2f}s, "
+          f"point CPU {point_cpu:.2f}s -> {store.directory}")
+    return store.load()
+
+if __name__ == "__main__":
+    one_at_a_time_sweeps()
+    distance_sweeps()
+    joint_sweep()
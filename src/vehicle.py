@@ -0,0 +1,105 @@
+# src/vehicle.py
+
+import numpy as np
+
+class Fleet:
+    """
+    Point-mass vehicles stored as a struct of arrays.
+
+    Every field is one contiguous array with a row per vehicle, so a whole
+    swarm is advanced by a handful of array operations:
+      pos, vel (M, 3):   position [m] and velocity [m/s].
+      att (M, 3):        attitude (roll, pitch, yaw) [rad].
+      max_acc, max_vel:  (M,) per-vehicle limits (inf = unlimited).
+      alive, captured:   (M,) flags; only alive, uncaptured vehicles move.
+
+    Limits are per axis by default (like the Day-4 max_thrust/max_vel
+    clipping in main.py), or on the vector norm with limit_mode="norm".
+    """
+    def __init__(self, n, pos=None, vel=None, att=None, max_acc=np.inf, max_vel=np.inf, limit_mode="axis"):
+        """
+        Args:
+            n (int): Number of vehicles.
+            pos, vel, att: (n, 3) or (3,) initial states (default: zeros).
+            max_acc (float or array): Acceleration/thrust limit [m/s^2].
+            max_vel (float or array): Speed limit [m/s].
+            limit_mode (str): "axis" (elementwise clip) or "norm".
+        """
+        if limit_mode not in ("axis", "norm"):
+            raise ValueError(f"Unknown limit_mode: {limit_mode}")
+        self.n = n
+        self.pos = np.zeros((n, 3))
+        self.vel = np.zeros((n, 3))
+        self.att = np.zeros((n, 3))
+        for field, value in (("pos", pos), ("vel", vel), ("att", att)):
+            if value is not None:
+                getattr(self, field)[:] = value
+        self.max_acc = np.broadcast_to(np.asarray(max_acc, dtype=float), (n,)).copy()
+        self.max_vel = np.broadcast_to(np.asarray(max_vel, dtype=float), (n,)).copy()
+        self.limit_mode = limit_mode
+        self.alive = np.ones(n, dtype=bool)
+        self.captured = np.zeros(n, dtype=bool)
+        self._acc = np.empty((n, 3))
+        self._step = np.empty((n, 3))
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def active(self):
+        """
+        (M,) mask of vehicles still moving (alive and not captured).
+        """
+        return self.alive & ~self.captured
+
+    def _limit(self, vec, limit):
+        if self.limit_mode == "axis":
+            lim = limit[:, None]
+            np.minimum(vec, lim, out=vec)
+            np.maximum(vec, -lim, out=vec)
+        else:
+            norm = np.linalg.norm(vec, axis=1)
+            over = norm > limit
+            vec[over] *= (limit[over] / norm[over])[:, None]
+        return vec
+
+    def integrate(self, acc, dt, att_rate=None):
+        """
+        Advance all active vehicles one explicit-Euler step: limit the
+        commanded acceleration, update and limit velocity, then position
+        (and attitude, if rates are given). Inactive vehicles keep their
+        state unchanged.
+        Args:
+            acc (np.array): (M, 3) commanded accelerations.
+            dt (float): Time step [s].
+            att_rate (np.array or None): (M, 3) attitude rates [rad/s].
+        Returns:
+            np.array: (M, 3) applied accelerations (zero for inactive vehicles),
+                in a buffer reused by the next call.
+        """
+        applied = self._acc
+        np.copyto(applied, acc)
+        self._limit(applied, self.max_acc)
+        frozen = ~self.active
+        if not frozen.any():
+            frozen = None
+        else:
+            applied[frozen] = 0.0
+
+        step = self._step
+        np.multiply(applied, dt, out=step)
+        step += self.vel
+        self._limit(step, self.max_vel)
+        if frozen is not None:
+            step[frozen] = self.vel[frozen]  # Not re-limited either
+        np.copyto(self.vel, step)
+        np.multiply(self.vel, dt, out=step)
+        if frozen is not None:
+            step[frozen] = 0.0
+        self.pos += step
+        if att_rate is not None:
+            np.multiply(att_rate, dt, out=step)
+            if frozen is not None:
+                step[frozen] = 0.0
+            self.att += step
+        return applied
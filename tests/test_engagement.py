@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import itertools
+
+import numpy as np
+import pytest
+
+from engagement import UniformGrid, auction_assign, run_engagement
+from guidance import PurePursuitGuidance
+from target import HelicalSwarm
+
+@pytest.mark.parametrize("cell_size", [0.5, 3.0, 50.0])
+@pytest.mark.parametrize("k", [1, 4, 40])
+def test_grid_query_matches_brute_force(cell_size, k):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-10, 10, (30, 3))
+    ids = rng.permutation(100)[:30]
+    # Queries inside and well outside the indexed points' bounds
+    queries = np.concatenate([rng.uniform(-10, 10, (20, 3)), rng.uniform(-40, 40, (10, 3))])
+    dist, found = UniformGrid(cell_size).build(points, ids=ids).query(queries, k=k)
+
+    all_dist = np.linalg.norm(queries[:, None] - points[None], axis=2)
+    order = np.argsort(all_dist, axis=1)[:, :k]
+    m = min(k, len(points))
+    np.testing.assert_allclose(dist[:, :m], np.take_along_axis(all_dist, order, axis=1)[:, :m])
+    np.testing.assert_array_equal(found[:, :m], ids[order[:, :m]])
+    # Fewer points than k: the rest is padding
+    assert np.all(dist[:, m:] == np.inf) and np.all(found[:, m:] == -1)
+
+@pytest.mark.parametrize("seed", range(40))
+def test_auction_is_optimal_on_small_cases(seed):
+    rng = np.random.default_rng(seed)
+    n, M = (int(x) for x in rng.integers(1, 7, size=2))
+    benefit = -rng.uniform(0, 10, (n, M))
+    eps = 1e-3
+    assigned = auction_assign(np.tile(np.arange(M), (n, 1)), benefit, M, eps=eps)
+
+    taken = assigned[assigned >= 0]
+    assert len(taken) == min(n, M) == len(set(taken))
+    total = benefit[assigned >= 0, taken].sum()
+    if n <= M:
+        best = max(benefit[np.arange(n), list(p)].sum() for p in itertools.permutations(range(M), n))
+    else:
+        best = max(benefit[list(p), np.arange(M)].sum() for p in itertools.permutations(range(n), M))
+    assert total >= best - min(n, M) * eps
+
+def test_engagement_counts_only_steps_run():
+    # Three static targets, five pursuers: every target falls long before N
+    targets = HelicalSwarm([[0.0, 0.0, 0.0], [6.0, 0.0, 0.0], [0.0, 6.0, 0.0]], radius=0.0, z_rate=0.0)
+    pursuers = np.array([[-3.0, 0.0, 0.0], [9.0, 0.0, 0.0], [0.0, 9.0, 0.0], [-5.0, -5.0, 0.0], [10.0, 10.0, 0.0]])
+    pairs, summary = run_engagement(pursuers, targets, PurePursuitGuidance(gain=2.0), N=400)
+
+    assert summary["kill_rate"] == 1.0
+    assert summary["pursuers_expended"] == 3
+    # Active pursuers always hold an assignment, so per-pursuer steps are steps flown:
+    # up to its kill for a killer, and up to the last kill (the end of the run) otherwise
+    steps = pairs.groupby("pursuer")["steps"].sum()
+    killers = pairs.loc[pairs["killed"], "pursuer"].unique()
+    survivors = np.setdiff1d(np.arange(len(pursuers)), killers)
+    assert len(survivors) == 2
+    assert steps.max() < 400
+    assert np.all(steps[survivors] == steps[killers].max())
+
+def test_kill_time_is_end_of_killing_step():
+    # One static target straight ahead: the kill step's end is the kill time
+    targets = HelicalSwarm([[5.0, 0.0, 0.0]], radius=0.0, z_rate=0.0)
+    pairs, summary = run_engagement(np.zeros((1, 3)), targets, PurePursuitGuidance(gain=2.0), dt=0.05, N=400)
+    assert pairs["killed"].all()
+    assert summary["mean_kill_time"] == pairs["steps"].iloc[0] * 0.05
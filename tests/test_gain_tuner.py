@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import gain_tuner
+from gain_tuner import tune_position_gains
+
+def _toy_cost(kp, kd, trials):
+    # Bowl with its minimum at kp=3, kd=1, plus a small per-trial wobble
+    return (kp - 3.0) ** 2 + (kd - 1.0) ** 2 + 1e-3 * np.sin(trials * (kp + kd))
+
+@pytest.fixture
+def toy_evaluations(monkeypatch):
+    calls = []
+
+    def evaluate(kp, kd, start, stop, seed=0, **kwargs):
+        calls.append((kp, kd, start, stop))
+        return pd.DataFrame({"cost": _toy_cost(kp, kd, np.arange(start, stop))})
+    monkeypatch.setattr(gain_tuner, "evaluate_gains", evaluate)
+    return calls
+
+def test_successive_halving_keeps_best_arm(toy_evaluations):
+    result = tune_position_gains(kp_range=(0.5, 8.0), kd_range=(0.2, 4.0), candidates=27, eta=3,
+                                 objective=lambda df: df["cost"].mean())
+    true_cost = {(kp, kd): _toy_cost(kp, kd, 0) for kp, kd, _, _ in toy_evaluations}
+    assert (result["kp"], result["kd"]) == min(true_cost, key=true_cost.get)
+    assert abs(result["kp"] - 3.0) < 0.5 and abs(result["kd"] - 1.0) < 0.5
+
+@pytest.mark.parametrize("candidates, sizes", [(81, [81, 27, 9, 3, 1]), (10, [10, 3, 1])])
+def test_budget_and_rung_sizes(toy_evaluations, candidates, sizes):
+    result = tune_position_gains(candidates=candidates, min_trials=4, eta=3,
+                                 objective=lambda df: df["cost"].mean())
+    history = result["history"]
+    budgets = [4 * 3 ** r for r in range(len(sizes))]
+    assert history.groupby("rung").size().tolist() == sizes
+    assert history.groupby("rung")["trials"].unique().map(list).tolist() == [[b] for b in budgets]
+
+    # Survivors only simulate the trials added since their last rung
+    added = [stop - start for _, _, start, stop in toy_evaluations]
+    expected = [n * (b - prev) for n, b, prev in zip(sizes, budgets, [0] + budgets[:-1])]
+    assert sum(added) == result["trials_used"] == sum(expected)
+    assert all(start == 0 or start in budgets for _, _, start, _ in toy_evaluations)
+    assert result["trials"] == budgets[-1]
+    assert result["brute_force_trials"] == candidates * budgets[-1]
@@ -11,22 +11,12 @@ import pandas as pd
 
 from position_controller import PositionController
 from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
-
-# --- Target Trajectory (3D helix) ---
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
+from sensors import GaussianNoiseSensor, SpikeDisturbance
+from simulator import Simulator
+from target import HelicalTarget
 
 # --- Simulation Function ---
 def run_sim(guidance_type="pure_pursuit", noise=0.0, disturbance=False, N=400, dt=0.05, capture_radius=0.5):
-    pursuer_pos = np.array([-7.0, -7.0, 0.0])
-    pursuer_vel = np.zeros(3)
-    traj_pursuer = [pursuer_pos.copy()]
-    traj_target = []
-    acc_history = []
-
     # Guidance Law
     if guidance_type == "pure_pursuit":
         guidance = PurePursuitGuidance(gain=1.0)
@@ -37,36 +27,14 @@ def run_sim(guidance_type="pure_pursuit", noise=0.0, disturbance=False, N=400, d
 
     controller = PositionController(kp=2.0, kd=1.0)
 
-    for i in range(N):
-        t = i * dt
-        target = helical_target(t)
-        traj_target.append(target.copy())
-
-        # Sensor noise
-        noisy_pos = pursuer_pos + np.random.normal(0, noise, size=3)
-
-        # Guidance command
-        if isinstance(guidance, PurePursuitGuidance):
-            desired_dir = guidance.compute_command(noisy_pos, target)
-        elif isinstance(guidance, ProportionalNavigationGuidance):
-            target_vel = np.array(helical_target(t + dt)) - np.array(target)
-            desired_dir = guidance.compute_command(noisy_pos, pursuer_vel, target, target_vel)
-
-        # Convert to acceleration
-        acc = controller.compute_acceleration(noisy_pos, pursuer_vel, pursuer_pos + desired_dir)
-
-        if disturbance and np.random.rand() < 0.05:
-            acc += np.random.uniform(-1, 1, size=3)
-
-        acc_history.append(acc.copy())
-
-        pursuer_vel += acc * dt
-        pursuer_pos += pursuer_vel * dt
-        traj_pursuer.append(pursuer_pos.copy())
+    # The controller tracks (true position + guidance command) from sensed state
+    sim = Simulator(HelicalTarget(), guidance=guidance, controller=controller,
+                    sensor=GaussianNoiseSensor(noise),
+                    disturbance=SpikeDisturbance() if disturbance else None,
+                    dt=dt, N=N, setpoint="true")
+    traj_pursuer, traj_target, acc_history = sim.run()
 
     # Metrics
-    traj_pursuer = np.array(traj_pursuer)
-    traj_target = np.array(traj_target)
     distances = np.linalg.norm(traj_pursuer[:len(traj_target)] - traj_target, axis=1)
     min_dist = np.min(distances)
 
@@ -116,7 +84,7 @@ if __name__ == "__main__":
                 label=guidance_type, color=colors[guidance_type], linestyle='-')
 
     # Plot target
-    traj_target = np.array([helical_target(i * 0.05) for i in range(400)])
+    traj_target = HelicalTarget().positions(np.arange(400) * 0.05)
     ax.plot(traj_target[:, 0], traj_target[:, 1], traj_target[:, 2], 'k--', label="Target")
 
     ax.set_xlabel("X")
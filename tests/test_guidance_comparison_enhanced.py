@@ -12,50 +12,26 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 
 from position_controller import PositionController
 from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
-
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
+from sensors import GaussianNoiseSensor, SpikeDisturbance
+from simulator import Simulator
+from target import HelicalTarget
 
 def simulate(guidance_type, noise=0.0, disturbance=False, N=400, dt=0.05):
-    pursuer_pos = np.array([-7.0, -7.0, 0.0])
-    pursuer_vel = np.zeros(3)
-    traj_pursuer = []
-    traj_target = []
-
     if guidance_type == "pp":
         guidance = PurePursuitGuidance(gain=1.0)
+        controller = PositionController(2.0, 1.0)
     elif guidance_type == "pn":
         guidance = ProportionalNavigationGuidance(nav_constant=3.0)
+        controller = None
     else:
         raise ValueError("Unknown guidance type")
 
-    for i in range(N):
-        t = i * dt
-        target_pos = helical_target(t)
-        traj_target.append(target_pos.copy())
-
-        pos_noise = np.random.normal(0, noise, size=3)
-        sensed_pos = pursuer_pos + pos_noise
-
-        if guidance_type == "pp":
-            cmd = guidance.compute_command(sensed_pos, target_pos)
-            acc = PositionController(2.0, 1.0).compute_acceleration(sensed_pos, pursuer_vel, sensed_pos + cmd)
-        else:
-            target_vel = np.array([-np.sin(t), np.cos(t), 0.2])
-            cmd = guidance.compute_command(sensed_pos, pursuer_vel, target_pos, target_vel)
-            acc = cmd
-
-        if disturbance and np.random.rand() < 0.05:
-            acc += np.random.uniform(-1, 1, size=3)
-
-        pursuer_vel += acc * dt
-        pursuer_pos += pursuer_vel * dt
-        traj_pursuer.append(pursuer_pos.copy())
-
-    return np.array(traj_pursuer), np.array(traj_target)
+    sim = Simulator(HelicalTarget(), guidance=guidance, controller=controller,
+                    sensor=GaussianNoiseSensor(noise),
+                    disturbance=SpikeDisturbance() if disturbance else None,
+                    dt=dt, N=N)
+    traj_pursuer, traj_target, _ = sim.run()
+    return traj_pursuer[1:], traj_target
 
 def plot_and_animate(traj_pp, traj_pn, traj_target, out_path):
     fig = plt.figure(figsize=(10, 5))
@@ -119,55 +95,29 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../s
 
 from position_controller import PositionController
 from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
-
-# --- Helical target ---
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
+from sensors import GaussianNoiseSensor, SpikeDisturbance
+from simulator import Simulator
+from target import HelicalTarget
 
 # --- Simulator ---
 def simulate(guidance_type, noise=0.0, disturbance=False, N=400, dt=0.05):
-    pursuer_pos = np.array([-7.0, -7.0, 0.0])
-    pursuer_vel = np.zeros(3)
-    traj_pursuer, traj_target, acc_hist = [], [], []
-    
-    controller = PositionController(kp=2.0, kd=1.0)
-    guidance = PurePursuitGuidance() if guidance_type == "pp" else ProportionalNavigationGuidance()
-
-    for i in range(N):
-        t = i * dt
-        target = helical_target(t)
-        traj_target.append(target.copy())
-
-        pos_noise = np.random.normal(0, noise, size=3)
-        current_pos = pursuer_pos + pos_noise
-        current_vel = pursuer_vel
-
-        if guidance_type == "pp":
-            desired_vel = guidance.compute_command(current_pos, target)
-            acc = controller.compute_acceleration(current_pos, current_vel, current_pos + desired_vel)
-        elif guidance_type == "pn":
-            target_vel = np.array([-np.sin(t), np.cos(t), 0.2])  # Approx helix tangent
-            acc = guidance.compute_command(current_pos, current_vel, target, target_vel)
-        else:
-            raise ValueError("Unknown guidance type")
-
-        if disturbance and np.random.rand() < 0.05:
-            acc += np.random.uniform(-1, 1, size=3)
-
-        acc_hist.append(acc.copy())
-
-        pursuer_vel += acc * dt
-        pursuer_pos += pursuer_vel * dt
-        traj_pursuer.append(pursuer_pos.copy())
-
-    traj_pursuer = np.array(traj_pursuer)
-    traj_target = np.array(traj_target)
-    acc_hist = np.array(acc_hist)
-
-    distances = np.linalg.norm(traj_pursuer[:len(traj_target)] - traj_target, axis=1)
+    if guidance_type == "pp":
+        guidance = PurePursuitGuidance()
+        controller = PositionController(kp=2.0, kd=1.0)
+    elif guidance_type == "pn":
+        guidance = ProportionalNavigationGuidance()
+        controller = None
+    else:
+        raise ValueError("Unknown guidance type")
+
+    sim = Simulator(HelicalTarget(), guidance=guidance, controller=controller,
+                    sensor=GaussianNoiseSensor(noise),
+                    disturbance=SpikeDisturbance() if disturbance else None,
+                    dt=dt, N=N)
+    traj_pursuer, traj_target, acc_hist = sim.run()
+    traj_pursuer = traj_pursuer[1:]
+
+    distances = np.linalg.norm(traj_pursuer - traj_target, axis=1)
     miss_distance = distances[-1]
     time_to_intercept = next((i * dt for i, d in enumerate(distances) if d < 1.0), None)
     energy = np.sum(np.linalg.norm(acc_hist, axis=1)**2) * dt
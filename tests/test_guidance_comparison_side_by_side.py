@@ -7,51 +7,43 @@ import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-from position_controller import PositionController
 from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
-
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
+from sensors import GaussianNoiseSensor, SpikeDisturbance
+from simulator import Simulator
+from target import HelicalTarget
+from trajectory_file import TrajectoryFile, TrajectoryWriter
 
 def simulate(guidance_type, noise=0.0, disturbance=False, N=400, dt=0.05):
-    pursuer_pos = np.array([-7.0, -7.0, 0.0])
-    pursuer_vel = np.zeros(3)
-    traj_pursuer = []
-    traj_target = []
-
     if guidance_type == "pp":
+        # Pure pursuit output is a desired velocity
         guidance = PurePursuitGuidance()
+        command = "velocity"
     elif guidance_type == "pn":
         guidance = ProportionalNavigationGuidance()
+        command = "acceleration"
     else:
         raise ValueError("Invalid guidance type")
 
-    for i in range(N):
-        t = i * dt
-        target = helical_target(t)
-        traj_target.append(target.copy())
-
-        pos_noise = np.random.normal(0, noise, size=3)
-        current_pos = pursuer_pos + pos_noise
-
-        if guidance_type == "pp":
-            vel_cmd = guidance.compute_command(current_pos, target)
-            acc = vel_cmd - pursuer_vel
-        elif guidance_type == "pn":
-            target_vel = np.array([-np.sin(t), np.cos(t), 0.2])
-            acc = guidance.compute_command(current_pos, pursuer_vel, target, target_vel)
-
-        if disturbance and np.random.rand() < 0.05:
-            acc += np.random.uniform(-1, 1, size=3)
-
-        pursuer_vel += acc * dt
-        pursuer_pos += pursuer_vel * dt
-        traj_pursuer.append(pursuer_pos.copy())
-
-    return np.array(traj_pursuer), np.array(traj_target)
+    sim = Simulator(HelicalTarget(), guidance=guidance, command=command,
+                    sensor=GaussianNoiseSensor(noise),
+                    disturbance=SpikeDisturbance() if disturbance else None,
+                    dt=dt, N=N)
+    traj_pursuer, traj_target, _ = sim.run()
+    return traj_pursuer[1:], traj_target
+
+def save_trajectories(path, pursuer, target, **meta):
+    with TrajectoryWriter(path, meta=meta) as writer:
+        writer.write(0, "pursuer", pursuer)
+        writer.write(0, "target", target)
+
+def load_trajectories(path, run=None):
+    """
+    Pursuer and target blocks of one run (default: the first) of a .traj
+    file, memory-mapped rather than read.
+    """
+    traj = TrajectoryFile(path)
+    run = traj.runs[0] if run is None else run
+    return traj[run, "pursuer"], traj[run, "target"]
 
 def animate_3d(pursuer, target, out_file):
     fig = plt.figure()
@@ -96,10 +88,20 @@ if __name__ == "__main__":
     parser.add_argument("--guidance", choices=["pp", "pn"], default="pp", help="Guidance law: pp or pn")
     parser.add_argument("--noise", type=float, default=0.0, help="Sensor noise stddev")
     parser.add_argument("--disturbance", action="store_true", help="Add random disturbance")
+    parser.add_argument("--traj", help="Render an existing .traj file instead of simulating")
+    parser.add_argument("--run", type=int, help="Run to render from --traj (default: first)")
     args = parser.parse_args()
 
-    pursuer, target = simulate(args.guidance, args.noise, args.disturbance)
     os.makedirs("doc", exist_ok=True)
-    out_path = f"doc/guidance_comparison_{args.guidance}.gif"
+    traj_path = args.traj
+    if traj_path is None:
+        traj_path = f"doc/guidance_comparison_{args.guidance}.traj"
+        pursuer, target = simulate(args.guidance, args.noise, args.disturbance)
+        save_trajectories(traj_path, pursuer, target, guidance=args.guidance, noise=args.noise,
+                          disturbance=args.disturbance)
+        print(f"Trajectories saved to {traj_path}")
+    pursuer, target = load_trajectories(traj_path, args.run)
+    stem = os.path.splitext(os.path.basename(traj_path))[0]
+    out_path = f"doc/{stem}.gif" if args.run is None else f"doc/{stem}_run{args.run}.gif"
     animate_3d(pursuer, target, out_path)
     print(f"Animation saved to {out_path}")
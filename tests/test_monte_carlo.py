@@ -0,0 +1,130 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from guidance import ProportionalNavigationGuidance, PurePursuitGuidance
+from monte_carlo import (compare_sampling, replay_trial, run_guidance_parallel, run_guidance_retaining,
+                         run_guidance_sequential, run_guidance_to_store)
+from position_controller import PositionController
+from rare_event import draw_proposal_tapes
+from sensors import draw_trial_tapes
+from simulator import Simulator
+from stats import TrialRetainer, wilson_interval
+from target import HelicalTarget
+from trajectory_file import TrajectoryFile
+
+def test_wilson_interval_at_the_boundaries():
+    low, high = wilson_interval(0, 100)
+    assert low == 0.0 and 0.0 < high < 0.05
+    low, high = wilson_interval(100, 100)
+    assert 0.95 < low < 1.0 and high == 1.0
+    low, high = wilson_interval(30, 100)
+    assert low < 0.3 < high
+
+def test_sequential_run_stops_at_target_precision():
+    guidance = PurePursuitGuidance(gain=1.0)
+    agg, report = run_guidance_sequential(guidance, seed=2, miss_half_width=0.02, failure_half_width=0.03,
+                                          min_runs=50, workers=1, N=200)
+    assert report["converged"]
+    assert report["miss_half_width"] <= 0.02 and report["failure_half_width"] <= 0.03
+
+    # Sequential batches are a prefix of the fixed-size run
+    df = run_guidance_parallel(guidance, runs=report["trials"], seed=2, workers=1, N=200)
+    assert report["miss_distance"] == pytest.approx(df["miss_distance"].mean(), rel=1e-12)
+    assert agg.failures == df["time_to_intercept"].isna().sum()
+
+class UncachedHelix:
+    # positions/velocities only, no cache_key()
+    def __init__(self):
+        self.helix = HelicalTarget()
+
+    def positions(self, t):
+        return self.helix.positions(t)
+
+    def velocities(self, t):
+        return self.helix.velocities(t)
+
+def test_parallel_run_accepts_target_without_cache_key():
+    guidance = PurePursuitGuidance(gain=1.0)
+    df = run_guidance_parallel(guidance, runs=40, seed=3, workers=2, chunk_size=16, N=100,
+                               target=UncachedHelix())
+    expected = run_guidance_parallel(guidance, runs=40, seed=3, workers=1, N=100)
+    pd.testing.assert_frame_equal(df, expected)
+
+@pytest.mark.parametrize("guidance", [ProportionalNavigationGuidance(), PositionController(2.0, 1.0)])
+def test_store_resumes_after_guidance_is_used(guidance, tmp_path):
+    run_guidance_to_store(guidance, tmp_path, runs=20, seed=1, workers=1, chunk_size=10, N=50)
+    # Using the law in a Simulator allocates its scratch buffers
+    Simulator(HelicalTarget(), **{"controller" if isinstance(guidance, PositionController)
+                                  else "guidance": guidance}, N=10).run()
+    store = run_guidance_to_store(guidance, tmp_path, runs=40, seed=1, workers=1, chunk_size=10, N=50)
+    assert len(store) == 40
+
+def test_sampling_study_matches_separate_runs():
+    guidance = PurePursuitGuidance(gain=1.0)
+    report = compare_sampling(guidance, runs=24, replicates=3, strategies=("random", "halton"), seed=4,
+                              workers=1, chunk_size=10, N=100).set_index(["strategy", "metric"])
+    for strategy in ["random", "halton"]:
+        miss = [run_guidance_parallel(guidance, runs=24, seed=4 + rep, workers=1, N=100,
+                                      sampling=strategy)["miss_distance"].mean() for rep in range(3)]
+        row = report.loc[(strategy, "miss_distance")]
+        assert row["estimate"] == pytest.approx(np.mean(miss), rel=1e-12)
+        assert row["variance"] == pytest.approx(np.var(miss, ddof=1), rel=1e-9)
+
+@pytest.mark.parametrize("limits", [dict(min_runs=0), dict(max_runs=0)])
+def test_sequential_run_rejects_empty_batches(limits):
+    with pytest.raises(ValueError):
+        run_guidance_sequential(PurePursuitGuidance(), workers=1, N=50, **limits)
+
+def test_proposal_tapes_reduce_to_nominal():
+    tapes, log_w = draw_proposal_tapes(4, np.arange(5), N=60)
+    nominal = draw_trial_tapes(4, np.arange(5), N=60)
+    for key, value in nominal.items():
+        np.testing.assert_array_equal(tapes[key], value)
+    np.testing.assert_array_equal(log_w, 0.0)
+
+def test_proposal_likelihood_ratios_average_to_one():
+    _, log_w = draw_proposal_tapes(1, np.arange(20000), N=10, scale=1.05, spike_prob=0.15,
+                                   tilt=np.tile([1.0, -2.0, 0.5], (10, 1)))
+    w = np.exp(log_w)
+    assert abs(w.mean() - 1.0) < 5 * w.std() / np.sqrt(len(w))
+
+@pytest.mark.parametrize("sampling", ["random", "antithetic"])
+def test_replay_trial_reproduces_stored_row(sampling):
+    guidance = PurePursuitGuidance(gain=1.0)
+    df = run_guidance_parallel(guidance, runs=40, seed=5, workers=1, chunk_size=16, N=150, sampling=sampling)
+    k = int(df["miss_distance"].idxmax())
+    row, trace = replay_trial(guidance, int(df["trial"][k]), seed=int(df["seed"][k]), N=150, sampling=sampling)
+    np.testing.assert_equal(row[df.columns].to_numpy(dtype=float), df.loc[k].to_numpy(dtype=float))
+    assert np.nanmin(trace["range"]) == row["miss_distance"]
+    assert trace["pursuer_pos"].shape == (151, 3)
+
+def test_retainer_is_independent_of_chunking():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"trial": np.arange(5000), "miss_distance": rng.random(5000),
+                       "energy": rng.integers(0, 50, 5000).astype(float),
+                       "time_to_intercept": np.where(rng.random(5000) < 0.01, np.nan, 1.0)})
+    whole = TrialRetainer(k=4, reservoir=10, seed=3).update(df)
+    merged = TrialRetainer(k=4, reservoir=10, seed=3)
+    for start in range(0, 5000, 333):
+        merged.merge(TrialRetainer(k=4, reservoir=10, seed=3).update(df[start:start + 333]))
+    assert whole.selections() == merged.selections()
+    assert [t for _, t in whole.worst["miss_distance"].items()] == df.nlargest(4, "miss_distance")["trial"].tolist()
+    assert len(whole.sample.heap) == 10
+
+def test_retained_file_stores_target_once(tmp_path):
+    guidance = PurePursuitGuidance(gain=1.0)
+    path = str(tmp_path / "retained.traj")
+    _, retained = run_guidance_retaining(guidance, runs=60, seed=2, workers=1, k=2, reservoir=3, N=120, path=path)
+    traj = TrajectoryFile(path)
+    trials = sorted({trial for _, trial in retained.selections()})
+    assert traj.runs == trials
+    assert np.sum(traj.index["entity"] == b"target") == 1
+
+    row, trace = replay_trial(guidance, trials[0], seed=2, N=120)
+    np.testing.assert_allclose(traj[trials[0], "target"], trace["target_pos"], atol=1e-4)
+    np.testing.assert_allclose(traj[trials[0], "pursuer"], trace["pursuer_pos"], atol=1e-4)
@@ -8,47 +8,24 @@ import matplotlib.pyplot as plt
 
 from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
 from position_controller import PositionController
-
-def helical_target(t, radius=5, z_rate=0.2, speed=1.0):
-    x = radius * np.cos(speed * t)
-    y = radius * np.sin(speed * t)
-    z = z_rate * t
-    return np.array([x, y, z])
-
-def run_guidance_sim(guidance, noise=0.1, disturbance=True, dt=0.05, N=400, capture_radius=0.5):
-    pursuer_pos = np.array([-7.0, -7.0, 0.0])
-    pursuer_vel = np.zeros(3)
-    traj_pursuer = []
-    traj_target = []
-    acc_history = []
-
-    for i in range(N):
-        t = i * dt
-        target = helical_target(t)
-        traj_target.append(target)
-
-        noisy_pos = pursuer_pos + np.random.normal(0, noise, 3)
-        noisy_vel = pursuer_vel + np.random.normal(0, noise * 0.1, 3)
-
-        if isinstance(guidance, PurePursuitGuidance):
-            acc = guidance.compute_command(noisy_pos, target)
-        else:
-            target_vel = np.array(helical_target(t + dt)) - np.array(target)
-            acc = guidance.compute_command(noisy_pos, noisy_vel, target, target_vel)
-
-        if disturbance and np.random.rand() < 0.05:
-            acc += np.random.uniform(-1, 1, 3)
-
-        pursuer_vel += acc * dt
-        pursuer_pos += pursuer_vel * dt
-        traj_pursuer.append(pursuer_pos.copy())
-        acc_history.append(acc)
-
-    traj_pursuer = np.array(traj_pursuer)
-    traj_target = np.array(traj_target)
-    acc_history = np.array(acc_history)
-
-    distances = np.linalg.norm(traj_pursuer[:len(traj_target)] - traj_target, axis=1)
+from monte_carlo import (compare_guidance, compare_sampling, replay_trial, run_guidance_parallel,
+                         run_guidance_retaining, run_guidance_sequential, run_guidance_streaming,
+                         run_guidance_to_store)
+from sensors import draw_trial_tapes, replay_tape
+from simulator import Simulator
+from result_store import ResultStore
+from stats import TrialAggregator
+from target import HelicalTarget
+
+def run_guidance_sim(guidance, noise=0.1, disturbance=True, dt=0.05, N=400, capture_radius=0.5, seed=0, trial=0):
+    # Replays trial `trial`'s tape, so every guidance law sees the same noise
+    sensor, spikes = replay_tape(draw_trial_tapes(seed, [trial], N=N, noise=noise, disturbance=disturbance))
+    sim = Simulator(HelicalTarget(), guidance=guidance, sensor=sensor,
+                    disturbance=spikes if disturbance else None,
+                    dt=dt, N=N)
+    traj_pursuer, traj_target, acc_history = sim.run()
+
+    distances = np.linalg.norm(traj_pursuer[1:] - traj_target, axis=1)
     min_dist = np.min(distances)
     energy = np.sum(np.linalg.norm(acc_history, axis=1)**2) * dt
 
@@ -64,43 +41,115 @@ def run_guidance_sim(guidance, noise=0.1, disturbance=True, dt=0.05, N=400, capt
         "energy": energy
     }
 
-def monte_carlo_run(label, guidance, runs=100):
+def monte_carlo_run(label, guidance, runs=100, seed=0, workers=None):
     print(f"Running Monte Carlo for {label} ({runs} runs)...")
-    results = []
-    for i in range(runs):
-        metrics = run_guidance_sim(guidance)
-        results.append(metrics)
-    df = pd.DataFrame(results)
+    df = run_guidance_parallel(guidance, runs=runs, seed=seed, workers=workers)
     df["method"] = label
     return df
 
+def monte_carlo_stream(label, guidance, runs=100, seed=0, workers=None):
+    print(f"Running streaming Monte Carlo for {label} ({runs} runs)...")
+    return run_guidance_streaming(guidance, runs=runs, seed=seed, workers=workers)
+
+def monte_carlo_sequential(label, guidance, miss_half_width=0.01, failure_half_width=0.01, seed=0, workers=None):
+    """
+    Run trials in batches until the 95% CIs on mean miss distance and
+    failure rate are within the given half-widths.
+    """
+    print(f"Running sequential Monte Carlo for {label} "
+          f"(+/-{miss_half_width} m miss, +/-{failure_half_width} failure rate)...")
+    agg, report = run_guidance_sequential(guidance, seed=seed, miss_half_width=miss_half_width,
+                                          failure_half_width=failure_half_width, workers=workers)
+    print(f"  {report['trials']} trials in {report['batches']} batches: "
+          f"miss {report['miss_distance']:.4f} +/- {report['miss_half_width']:.4f} m, "
+          f"failure rate {report['failure_rate']:.4f} +/- {report['failure_half_width']:.4f}")
+    return agg, report
+
+def monte_carlo_store(label, guidance, runs=100, seed=0, workers=None, root="doc/monte_carlo_results"):
+    """
+    Run (or resume) `runs` trials into a per-method ResultStore and summarise
+    it chunk by chunk, reading only the metric columns.
+    """
+    directory = os.path.join(root, label.lower().replace(" ", "_"))
+    print(f"Running Monte Carlo for {label} ({runs} runs) -> {directory}...")
+    store = run_guidance_to_store(guidance, directory, runs=runs, seed=seed, workers=workers)
+    agg = TrialAggregator()
+    for _, _, chunk in store.iter_chunks(list(agg.metrics)):
+        agg.update(chunk)
+    return agg
+
+def replay_worst(label, guidance, root="doc/monte_carlo_results"):
+    """
+    Replay the worst-miss trial of a stored study from its (seed, trial) key.
+    """
+    df = ResultStore(os.path.join(root, label.lower().replace(" ", "_"))).load(["trial", "seed", "miss_distance"])
+    worst = df.loc[df["miss_distance"].idxmax()]
+    row, trace = replay_trial(guidance, int(worst["trial"]), seed=int(worst["seed"]))
+    print(f"[Replay] {label} trial {int(worst['trial'])}: miss {row['miss_distance']:.4f} m "
+          f"(stored {worst['miss_distance']:.4f} m), closest at step {np.nanargmin(trace['range'])}")
+    return row, trace
+
 def main():
     pp = PurePursuitGuidance(gain=1.0)
     pn = ProportionalNavigationGuidance(nav_constant=3.0)
 
-    df_pp = monte_carlo_run("Pure Pursuit", pp)
-    df_pn = monte_carlo_run("Proportional Navigation", pn)
+    aggregates = {
+        "Pure Pursuit": monte_carlo_store("Pure Pursuit", pp),
+        "Proportional Navigation": monte_carlo_store("Proportional Navigation", pn),
+    }
 
-    full_df = pd.concat([df_pp, df_pn], ignore_index=True)
+    rows = []
+    for label, agg in aggregates.items():
+        for metric, stats in agg.summary().items():
+            rows.append({"method": label, "metric": metric, **stats})
+        rows.append({"method": label, "metric": "failures", "count": agg.failures})
     os.makedirs("doc", exist_ok=True)
-    full_df.to_csv("doc/monte_carlo_results.csv", index=False)
-    print("✅ Saved doc/monte_carlo_results.csv")
-
-    # --- Boxplots ---
+    pd.DataFrame(rows).to_csv("doc/monte_carlo_summary.csv", index=False)
+    print("✅ Saved doc/monte_carlo_summary.csv")
+
+    # --- Worst trial of each study, replayed on its own ---
+    replay_worst("Pure Pursuit", pp)
+    replay_worst("Proportional Navigation", pn)
+
+    # --- Worst-case and typical trajectories, kept in bounded memory ---
+    for label, guidance in [("Pure Pursuit", pp), ("Proportional Navigation", pn)]:
+        path = f"doc/monte_carlo_retained_{label.lower().replace(' ', '_')}.traj"
+        run_guidance_retaining(guidance, runs=1000, k=5, reservoir=20, path=path)
+        print(f"✅ Saved {path}")
+
+    # --- Sequential runs to a target precision ---
+    reports = [{"method": label, **monte_carlo_sequential(label, guidance)[1]}
+               for label, guidance in [("Pure Pursuit", pp), ("Proportional Navigation", pn)]]
+    pd.DataFrame(reports).to_csv("doc/monte_carlo_sequential.csv", index=False)
+    print("✅ Saved doc/monte_carlo_sequential.csv")
+
+    # --- Paired PP - PN differences on common random numbers ---
+    for metric in ["miss_distance", "energy"]:
+        result = compare_guidance(pp, pn, runs=100, metric=metric)
+        print(f"[CRN] {metric}: PP - PN = {result['diff']:.4f} +/- {result['std_err']:.4f} "
+              f"(z = {result['z_score']:.1f}, ~{result['trials_needed']} trials needed)")
+
+    # --- Variance reduction per sampling strategy ---
+    sampling = pd.concat([compare_sampling(guidance, runs=128).assign(method=label)
+                          for label, guidance in [("Pure Pursuit", pp), ("Proportional Navigation", pn)]],
+                         ignore_index=True)
+    sampling.to_csv("doc/monte_carlo_sampling.csv", index=False)
+    print(sampling.to_string(index=False))
+    print("✅ Saved doc/monte_carlo_sampling.csv")
+
+    # --- Boxplots (from streaming quantiles) ---
     for metric in ["miss_distance", "time_to_intercept", "energy"]:
-        plt.figure(figsize=(6, 4))
-        full_df.boxplot(column=metric, by="method")
-        plt.title(f"{metric.replace('_', ' ').title()} by Guidance Method")
-        plt.suptitle("")
-        plt.ylabel(metric.replace('_', ' ').title())
+        fig, ax = plt.subplots(figsize=(6, 4))
+        ax.bxp([agg.boxplot_stats(metric, label) for label, agg in aggregates.items()], showfliers=False)
+        ax.set_title(f"{metric.replace('_', ' ').title()} by Guidance Method")
+        ax.set_ylabel(metric.replace('_', ' ').title())
         out_path = f"doc/monte_carlo_{metric}_boxplot.png"
-        plt.savefig(out_path)
+        fig.savefig(out_path)
         print(f"[✓] Saved {out_path}")
-        plt.close()
+        plt.close(fig)
 
     # --- Failure count (no intercept) ---
-    failures = full_df[full_df["time_to_intercept"].isna()]
-    fail_counts = failures["method"].value_counts()
+    fail_counts = pd.Series({label: agg.failures for label, agg in aggregates.items()})
     plt.figure(figsize=(5, 4))
     fail_counts.plot(kind="bar", color="red")
     plt.title("Failure Count (No Intercept)")
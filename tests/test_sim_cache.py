@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import numpy as np
+
+import metrics
+import target
+from sim_cache import SimCache
+
+def _simulate(kp, noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return {"miss_distance": kp + noise * rng.normal()}, {"traj": rng.normal(size=(5, 3))}
+
+def _other(kp, noise=0.0, seed=0):
+    return {"miss_distance": -kp}, {}
+
+def test_miss_then_hit_returns_same_result(tmp_path):
+    cache = SimCache(tmp_path / "cache")
+    calls = []
+
+    @cache.memoize
+    def simulate(kp, noise=0.0, seed=0):
+        calls.append(kp)
+        return _simulate(kp, noise, seed)
+
+    first = simulate(2.0, noise=0.3, seed=4)
+    second = simulate(2.0, noise=0.3, seed=4)
+    assert calls == [2.0] and (cache.misses, cache.hits) == (1, 1)
+    assert first[0] == second[0]
+    np.testing.assert_array_equal(first[1]["traj"], second[1]["traj"])
+    # Defaults are part of the key, so spelling them out is still a hit
+    simulate(kp=2.0, noise=0.0, seed=0)
+    simulate(2.0)
+    assert calls == [2.0, 2.0] and cache.hits == 2
+
+def test_key_changes_with_every_input(tmp_path):
+    cache = SimCache(tmp_path)
+    base = {"kp": 2.0, "noise": 0.1, "seed": 0}
+    keys = {cache.key(_simulate, base), cache.key(_other, base),
+            SimCache(tmp_path, modules=[metrics]).key(_simulate, base),
+            SimCache(tmp_path, modules=[target]).key(_simulate, base)}
+    for name, value in [("kp", 2.5), ("noise", 0.2), ("seed", 1), ("extra", None)]:
+        keys.add(cache.key(_simulate, {**base, name: value}))
+    assert len(keys) == 8
+    # Equal values of different types give the same key
+    assert cache.key(_simulate, base) == cache.key(_simulate, {"seed": np.int64(0), "kp": np.float64(2.0),
+                                                              "noise": 0.1})
+
+def test_evicts_least_recently_used_beyond_max_bytes(tmp_path):
+    cache = SimCache(tmp_path, max_bytes=10**9)
+    for i in range(5):
+        cache.store(f"k{i}", {"i": i}, {"a": np.zeros(1000)})
+        os.utime(cache._path(f"k{i}"), (1000 + i, 1000 + i))
+    size = os.path.getsize(cache._path("k0"))
+    # A hit refreshes k0, so k1 and k2 are now the oldest
+    assert cache.load("k0") is not None
+
+    cache.max_bytes = 4 * size
+    cache.store("k5", {"i": 5}, {"a": np.zeros(1000)})
+    remaining = sorted(name[:-4] for name in os.listdir(tmp_path))
+    assert remaining == ["k0", "k3", "k4", "k5"]
+
+def test_corrupt_or_missing_entry_is_a_miss(tmp_path):
+    cache = SimCache(tmp_path / "cache")
+    assert not os.path.exists(tmp_path / "cache")  # Nothing is created before the first store
+    assert cache.load("absent") is None
+
+    simulate = cache.memoize(_simulate)
+    expected = simulate(1.0)
+    path = cache._path(cache.key(_simulate, {"kp": 1.0, "noise": 0.0, "seed": 0}))
+    with open(path, "wb") as f:
+        f.write(b"not an npz")
+    assert cache.load(os.path.basename(path)[:-4]) is None
+    # The entry is recomputed and rewritten
+    assert simulate(1.0)[0] == expected[0]
+    assert cache.misses == 4 and simulate(1.0)[0] == expected[0] and cache.hits == 1
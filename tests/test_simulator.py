@@ -0,0 +1,227 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from guidance import PurePursuitGuidance, ProportionalNavigationGuidance
+from monte_carlo import run_guidance_batch
+from position_controller import PositionController
+from sensors import TapeSensor, draw_trial_tapes, replay_tape
+from simulator import AdaptiveSimulator, Simulator
+from target import HelicalTarget
+
+MODES = {
+    "pure_pursuit": lambda: dict(guidance=PurePursuitGuidance()),
+    "prop_nav": lambda: dict(guidance=ProportionalNavigationGuidance(), pursuer_vel=(1.0, 2.0, 0.0)),
+    "controller": lambda: dict(controller=PositionController(2.0, 1.0, 3.0), max_acc=2.0),
+    "guidance_and_controller": lambda: dict(guidance=PurePursuitGuidance(),
+                                            controller=PositionController(1.0, 1.0, np.inf)),
+    "true_setpoint": lambda: dict(guidance=PurePursuitGuidance(), controller=PositionController(2.0, 1.0),
+                                  setpoint="true"),
+    "velocity_command": lambda: dict(guidance=PurePursuitGuidance(), command="velocity"),
+}
+
+@pytest.mark.parametrize("mode", MODES)
+def test_step_steady_state_allocation(mode):
+    sim = Simulator(HelicalTarget(), N=400, stop_on_capture=True, capture_radius=0.0, **MODES[mode]())
+    for _ in range(20):
+        sim.step()
+
+    tracemalloc.start()
+    try:
+        for _ in range(300):
+            sim.step()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # No per-step arrays survive, and at most a few transient scalars/views are live at once
+    assert current < 256
+    assert peak < 2048
+
+@pytest.mark.parametrize("mode", MODES)
+def test_step_matches_reference_euler(mode):
+    sim = Simulator(HelicalTarget(), N=200, **MODES[mode]())
+    traj_pursuer, _, acc_history = sim.run()
+
+    pos = sim.initial_pos.copy()
+    vel = sim.initial_vel.copy()
+    for i in range(200):
+        vel = vel + acc_history[i] * sim.dt
+        pos = pos + vel * sim.dt
+    np.testing.assert_allclose(traj_pursuer[-1], pos, rtol=1e-12, atol=1e-9)
+
+@pytest.mark.parametrize("setpoint", ["sensed", "true"])
+def test_setpoint_and_velocity_modes_match_reference_loop(setpoint):
+    # Noisy runs against the original scripts' loops: the controller tracks
+    # (sensed or true position + command), and velocity commands give acc = cmd - vel
+    N, dt = 200, 0.05
+    tapes = draw_trial_tapes(0, [0], N=N, noise=0.2, disturbance=False)
+    traj_target = HelicalTarget().positions(np.arange(N) * dt)
+    controller = PositionController(2.0, 1.0)
+    guidance = PurePursuitGuidance()
+    runs = {
+        setpoint: dict(controller=controller, setpoint=setpoint),
+        "velocity": dict(command="velocity"),
+    }
+    for mode, kwargs in runs.items():
+        sensor = TapeSensor(tapes["pos_noise"][0])
+        sim = Simulator(HelicalTarget(), guidance=guidance, sensor=sensor, N=N, dt=dt, **kwargs)
+        traj_pursuer, _, _ = sim.run()
+
+        pos, vel = np.array([-7.0, -7.0, 0.0]), np.zeros(3)
+        for i in range(N):
+            noisy_pos = pos + tapes["pos_noise"][0, i]
+            cmd = guidance.compute_command(noisy_pos, traj_target[i])
+            if mode == "velocity":
+                acc = cmd - vel
+            else:
+                origin = pos if mode == "true" else noisy_pos
+                acc = controller.compute_acceleration(noisy_pos, vel, origin + cmd)
+            vel = vel + acc * dt
+            pos = pos + vel * dt
+        np.testing.assert_allclose(traj_pursuer[-1], pos, rtol=1e-12, atol=1e-9)
+
+def test_miss_window_waits_for_closest_approach():
+    # Starting off moving away: the opening range before the turn-around is not a miss
+    sim = Simulator(HelicalTarget(), guidance=PurePursuitGuidance(gain=3.0), pursuer_vel=(-3.0, -3.0, 0.0),
+                    miss_window=5, N=400)
+    traj_pursuer, traj_target, _ = sim.run()
+    distances = np.linalg.norm(traj_pursuer[1:] - traj_target, axis=1)
+    assert distances[1] > distances[0]
+    assert sim.i == np.argmin(distances) + 1 + 5
+
+def test_batch_draws_noise_step_by_step():
+    # Without tapes, memory is O(runs): a whole-run tape here would take 2000 * 400 * 72 B = 58 MB
+    tracemalloc.start()
+    try:
+        df = run_guidance_batch(PurePursuitGuidance(), runs=2000, N=400, rng=np.random.default_rng(0))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 5 * 2**20
+    assert df["miss_distance"].notna().all()
+
+def test_batch_always_reports_steps():
+    df = run_guidance_batch(PurePursuitGuidance(), runs=4, N=50, rng=np.random.default_rng(0))
+    assert (df["steps"] == 50).all()
+
+def test_adaptive_matches_fine_fixed_step_reference():
+    # Smooth PD chase of the helix; the reference is Richardson-extrapolated Euler at 2 ms / 1 ms
+    t_final = 5.0
+    sim = AdaptiveSimulator(HelicalTarget(), t_final=t_final, controller=PositionController(2.0, 1.0, np.inf))
+    times, traj_pursuer, _, _ = sim.run()
+    assert times[-1] == pytest.approx(t_final)
+    assert sim.step_count < 200
+
+    def fixed_step(dt):
+        N = int(round(t_final / dt))
+        ref = Simulator(HelicalTarget(), controller=PositionController(2.0, 1.0, np.inf), dt=dt, N=N)
+        positions, _, _ = ref.run()
+        return np.stack([np.interp(times, np.arange(N + 1) * dt, positions[:, k]) for k in range(3)], axis=1)
+
+    reference = 2 * fixed_step(0.001) - fixed_step(0.002)
+    np.testing.assert_allclose(traj_pursuer, reference, atol=1e-3)
+
+def test_adaptive_step_is_capped_by_range():
+    # Loose tolerances, so only the range cap limits the step near intercept
+    sim = AdaptiveSimulator(HelicalTarget(), t_final=8.0, guidance=PurePursuitGuidance(gain=3.0), rtol=1.0, atol=1.0)
+    steps, caps, ranges = [], [], []
+    while sim.t < sim.t_final - 1e-12:
+        i = sim.i
+        rng_to_target = np.linalg.norm(sim.traj_target[i] - sim.pos)
+        rel_speed = np.linalg.norm(sim.target_vel[i] - sim.vel)
+        t_start = sim.t
+        sim.step()
+        steps.append(sim.t - t_start)
+        caps.append(sim.step_fraction * rng_to_target / rel_speed)
+        ranges.append(rng_to_target)
+    steps, caps = np.array(steps), np.array(caps)
+
+    assert np.all(steps <= np.maximum(caps, sim.dt_min) + 1e-12)
+    assert steps.max() > 0.1
+    assert steps[np.argmin(ranges)] < 0.01
+    # Buffers grew past their initial t_final / dt_max rows and kept every sample
+    times, _, _, _ = sim.run()
+    assert len(times) == len(steps) + 1 > 8.0 / sim.dt_max
+    np.testing.assert_allclose(np.diff(times), steps)
+
+def test_kernels_write_into_out():
+    pos, vel = np.array([1.0, -2.0, 0.5]), np.array([0.3, 0.1, -0.2])
+    target, target_vel = np.array([4.0, 1.0, 2.0]), np.array([-0.5, 0.2, 0.1])
+    out = np.empty(3)
+
+    pp = PurePursuitGuidance(gain=2.0)
+    assert pp.compute_command(pos, target, out=out) is out
+    np.testing.assert_allclose(out, 2.0 * (target - pos) / np.linalg.norm(target - pos))
+
+    pn = ProportionalNavigationGuidance(nav_constant=3.0)
+    assert pn.compute_command(pos, vel, target, target_vel, out=out) is out
+    r, v = target - pos, target_vel - vel
+    np.testing.assert_allclose(out, 3.0 * np.cross(np.cross(r, v) / (r @ r + 1e-6), vel))
+
+    # Planar states: the 3D law in the z = 0 plane
+    planar = pn.compute_command(pos[:2], vel[:2], target[:2], target_vel[:2])
+    r, v = target[:2] - pos[:2], target_vel[:2] - vel[:2]
+    los_rate = (r[0] * v[1] - r[1] * v[0]) / (r @ r + 1e-6)
+    np.testing.assert_allclose(planar, 3.0 * los_rate * np.array([-vel[1], vel[0]]))
+
+    pd = PositionController(kp=2.0, kd=1.0, max_acc=np.inf)
+    assert pd.compute_acceleration(pos, vel, target, target_vel, out=out) is out
+    np.testing.assert_allclose(out, 2.0 * (target - pos) + (target_vel - vel))
+
+def test_batch_kernels():
+    rng = np.random.default_rng(0)
+    pos, vel, target, target_vel = rng.normal(0, 5, (4, 500, 3))
+    target[7] = pos[7]
+    pn = ProportionalNavigationGuidance(nav_constant=3.0)
+    out = np.empty((500, 3))
+    assert pn.compute_command_batch(pos, vel, target, target_vel, out=out) is out
+    r, v = target - pos, target_vel - vel
+    expected = 3.0 * np.cross(np.cross(r, v) / (np.sum(r * r, axis=1) + 1e-6)[:, None], vel)
+    expected[7] = 0.0
+    np.testing.assert_allclose(out, expected, rtol=1e-12, atol=1e-12)
+
+    # Scratch is reused (also for fewer rows, as after early termination)
+    pn.compute_command_batch(pos, vel, target, target_vel, out=out)
+    tracemalloc.start()
+    try:
+        pn.compute_command_batch(pos, vel, target, target_vel, out=out)
+        pn.compute_command_batch(pos[:200], vel[:200], target[:200], target_vel[:200], out=out[:200])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Only array views; any (500, 3) temporary alone would take 12 kB
+    assert peak < 4096
+    np.testing.assert_allclose(out[:200], expected[:200], rtol=1e-12, atol=1e-12)
+
+    # Integer input is promoted, as in the scalar kernel
+    pp = PurePursuitGuidance(gain=2.0)
+    np.testing.assert_allclose(pp.compute_command_batch([[0, 0, 0]], [[3, 4, 0]]), [[1.2, 1.6, 0.0]])
+
+@pytest.mark.parametrize("guidance", [PurePursuitGuidance(), ProportionalNavigationGuidance()])
+def test_tape_replay_matches_batch_trial(guidance):
+    # A Simulator replaying trial k's tape reproduces batch trial k (common random numbers)
+    tapes = draw_trial_tapes(7, [3, 4], N=200)
+    batch = run_guidance_batch(guidance, runs=2, tapes=tapes, N=200)
+
+    sensor, spikes = replay_tape(tapes, 1)
+    sim = Simulator(HelicalTarget(), guidance=guidance, sensor=sensor, disturbance=spikes, N=200)
+    _, _, acc_history = sim.run()
+    np.testing.assert_allclose(np.sum(acc_history ** 2) * sim.dt, batch["energy"][1], rtol=1e-9)
+
+@pytest.mark.parametrize("sampling", ["random", "antithetic", "halton"])
+def test_trial_tapes_do_not_depend_on_chunking(sampling):
+    whole = draw_trial_tapes(3, np.arange(10), N=50, sampling=sampling)
+    parts = [draw_trial_tapes(3, np.arange(a, b), N=50, sampling=sampling) for a, b in [(0, 3), (3, 10)]]
+    for key, value in whole.items():
+        np.testing.assert_array_equal(value, np.concatenate([p[key] for p in parts]))
+
+def test_antithetic_pairs_mirror_noise():
+    tapes = draw_trial_tapes(3, np.arange(4), N=50, sampling="antithetic")
+    np.testing.assert_array_equal(tapes["pos_noise"][1], -tapes["pos_noise"][0])
+    np.testing.assert_array_equal(tapes["vel_noise"][3], -tapes["vel_noise"][2])
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import itertools
+
+import numpy as np
+import pytest
+
+from result_store import ResultStore
+from sweep import factorial_design, halton_design, latin_hypercube, sweep_to_store
+
+RANGES = {"kp": (0.5, 5.0), "kd": (0.2, 3.0), "noise": (0.0, 0.3), "mode": ["a", "b", "c"]}
+
+def test_lhs_samples_every_stratum_once():
+    n = 30
+    points = latin_hypercube(n, seed=1, **RANGES)
+    for name, (low, high) in ((k, v) for k, v in RANGES.items() if isinstance(v, tuple)):
+        x = np.array([p[name] for p in points])
+        strata = np.floor((x - low) / (high - low) * n).astype(int)
+        assert sorted(strata) == list(range(n))
+    # n is a multiple of the level count, so the strata split evenly over the levels
+    modes = [p["mode"] for p in points]
+    assert all(modes.count(level) == n // 3 for level in RANGES["mode"])
+
+def test_designs_cover_categorical_levels():
+    levels = {"mode": ["a", "b", "c"], "disturbance": [False, True]}
+    points = factorial_design(kp=[1.0, 2.0], **levels)
+    assert len(points) == 12
+    assert {(p["kp"], p["mode"], p["disturbance"]) for p in points} == \
+        set(itertools.product([1.0, 2.0], *levels.values()))
+    for design in (latin_hypercube, halton_design):
+        points = design(16, seed=3, kp=(0.5, 5.0), **levels)
+        for name, values in levels.items():
+            assert {p[name] for p in points} == set(values)
+
+@pytest.mark.parametrize("design", [latin_hypercube, halton_design])
+def test_designs_are_reproducible(design):
+    assert design(20, seed=5, **RANGES) == design(20, seed=5, **RANGES)
+    assert design(20, seed=5, **RANGES) != design(20, seed=6, **RANGES)
+    assert factorial_design(kp=[1.0, 2.0], mode=["a", "b"]) == factorial_design(kp=[1.0, 2.0], mode=["a", "b"])
+
+def _point_metrics(x, order):
+    return {"y": 2.0 * x, "flag": None if x % 7 == 0 else x}
+
+def test_interrupted_sweep_resumes_to_missing_points(tmp_path):
+    n = 30
+    # Highest cost runs first: points finish in design order with neighbours
+    # swapped (1, 0, 3, 2, ...), so records arrive out of order
+    points = [{"x": float(i), "order": n - (i ^ 1)} for i in range(n)]
+    cost = lambda params: params["order"]
+
+    # Stop after 13 points: [0, 12) is flushed, point 13 is finished but lost
+    store = ResultStore(str(tmp_path), meta={"n": n})
+    for done, _ in enumerate(sweep_to_store(_point_metrics, points, store, workers=1, cost=cost, flush_every=4), 1):
+        if done == 13:
+            break
+    store = ResultStore(str(tmp_path), meta={"n": n})
+    stored = {i for start, stop in store.chunks for i in range(start, stop)}
+    assert stored == set(range(12)) and store.chunks == [(0, 4), (4, 8), (8, 12)]
+
+    resumed = [rec["point"] for rec in sweep_to_store(_point_metrics, points, store, workers=1, cost=cost,
+                                                      flush_every=4)]
+    assert sorted(resumed) == sorted(set(range(n)) - stored)
+
+    # A fresh reader sees contiguous, non-overlapping chunks covering every point
+    store = ResultStore(str(tmp_path), meta={"n": n})
+    chunks = store.chunks
+    assert chunks[0][0] == 0 and chunks[-1][1] == n
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(chunks, chunks[1:]))
+    assert all(stop - start <= 4 for start, stop in chunks)
+    df = store.load()
+    np.testing.assert_array_equal(df["point"], np.arange(n))
+    np.testing.assert_array_equal(df["y"], 2.0 * np.arange(n))
+    assert np.isnan(df["flag"][::7]).all()
@@ -0,0 +1,34 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import numpy as np
+import pytest
+
+from target import ConstantHeadingTarget, HelicalSwarm, HelicalTarget, TargetProfile
+
+TARGETS = [
+    TargetProfile([1.0, -2.0, 3.0], [1.0, 2.0, -0.5], speed=1.7),
+    ConstantHeadingTarget([5.0, 1.0], [0.0, 1.0], speed=2.0, turn_rate=0.3),
+    ConstantHeadingTarget([5.0, 1.0], [1.0, 1.0], speed=2.0, turn_rate=0.0),
+    HelicalTarget(radius=5.0, z_rate=0.2, speed=1.3),
+]
+
+# Central differences with h = 1e-3 are accurate to O(h^2) ~ 1e-6 here,
+# well above rounding (~1e-16 * |p| / h^2 for the second difference)
+H = 1e-3
+TOL = 1e-5
+
+@pytest.mark.parametrize("target", TARGETS, ids=lambda t: type(t).__name__)
+def test_derivatives_match_finite_differences(target):
+    t = np.linspace(0.0, 20.0, 41)
+    p_minus, p, p_plus = target.positions(t - H), target.positions(t), target.positions(t + H)
+
+    np.testing.assert_allclose(target.velocities(t), (p_plus - p_minus) / (2 * H), atol=TOL)
+    np.testing.assert_allclose(target.accelerations(t), (p_plus - 2 * p + p_minus) / H**2, atol=TOL)
+
+def test_swarm_velocities_match_finite_differences():
+    swarm = HelicalSwarm.random(6, seed=3)
+    t = np.linspace(0.0, 20.0, 41)
+    fd = (swarm.positions(t + H) - swarm.positions(t - H)) / (2 * H)
+    np.testing.assert_allclose(swarm.velocities(t), fd, atol=TOL)
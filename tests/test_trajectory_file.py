@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import numpy as np
+import pytest
+
+from trajectory_file import SHARED, TrajectoryFile, TrajectoryWriter
+
+def test_round_trip_raw_and_delta_blocks(tmp_path):
+    path = str(tmp_path / "runs.traj")
+    t = np.linspace(0, 20, 401)
+    pursuer = np.stack([np.cos(t), np.sin(t), 0.1 * t], axis=1) * 5.0
+    target = pursuer[::-1].copy()
+    with TrajectoryWriter(path, meta={"dt": 0.05}) as writer:
+        writer.write(3, "pursuer", pursuer)
+        writer.write(3, "target", target, dtype="float64")
+        writer.write(7, "pursuer", pursuer, delta=True)
+        writer.write(7, "range", np.linalg.norm(pursuer - target, axis=1))
+
+    traj = TrajectoryFile(path)
+    assert traj.meta == {"dt": 0.05}
+    assert traj.runs == [3, 7] and traj.entities == ["pursuer", "range", "target"]
+    assert (7, "target") not in traj
+
+    raw = traj[3, "pursuer"]
+    assert raw.dtype == np.float32 and not raw.flags.writeable
+    np.testing.assert_allclose(raw, pursuer, atol=1e-5)
+    np.testing.assert_array_equal(traj[3, "target"], target)
+    # 0.25 m steps: float16 rounds them to within 1.2e-4
+    np.testing.assert_allclose(traj[7, "pursuer"], pursuer, atol=1.2e-4)
+    assert traj[7, "range"].shape == (401, 1)
+
+def test_shared_blocks_serve_every_run(tmp_path):
+    path = str(tmp_path / "shared.traj")
+    target = np.arange(30.0).reshape(10, 3)
+    with TrajectoryWriter(path) as writer:
+        writer.write(SHARED, "target", target)
+        writer.write(0, "pursuer", np.zeros((10, 3)))
+        writer.write(4, "pursuer", np.ones((10, 3)))
+        writer.write(4, "target", -target)
+
+    traj = TrajectoryFile(path)
+    assert traj.runs == [0, 4]
+    assert (0, "target") in traj
+    np.testing.assert_array_equal(traj[0, "target"], target)
+    # A run's own block takes precedence
+    np.testing.assert_array_equal(traj[4, "target"], -target)
+
+def test_delta_blocks_shrink_without_drift(tmp_path):
+    t = np.linspace(0, 200, 4001)
+    helix = np.stack([5.0 * np.cos(t), 5.0 * np.sin(t), 0.2 * t], axis=1)
+    sizes = {}
+    for delta in (False, True):
+        path = str(tmp_path / f"{delta}.traj")
+        with TrajectoryWriter(path, delta=delta) as writer:
+            for run in range(10):
+                writer.write(run, "pursuer", helix + run)
+                writer.write(run, "range", np.linalg.norm(helix, axis=1))
+        sizes[delta] = os.path.getsize(path)
+    assert sizes[True] < 0.52 * sizes[False]
+
+    # Steps are rounded against the decoded rows, so the error stays at one
+    # step's rounding (2^-11 of 0.25 m) over 4000 rows instead of adding up
+    decoded = TrajectoryFile(path)[9, "pursuer"]
+    assert decoded.dtype == np.float64 and decoded.shape == helix.shape
+    assert np.array_equal(decoded[0], helix[0] + 9)
+    np.testing.assert_allclose(decoded, helix + 9, atol=1.2e-4)
+
+@pytest.mark.parametrize("rows", [0, 1])
+def test_short_delta_blocks(tmp_path, rows):
+    path = str(tmp_path / "short.traj")
+    with TrajectoryWriter(path, delta=True) as writer:
+        writer.write(0, "pursuer", np.full((rows, 3), 1e6))
+    np.testing.assert_array_equal(TrajectoryFile(path)[0, "pursuer"], np.full((rows, 3), 1e6))
+
+def test_delta_rejects_steps_beyond_float16(tmp_path):
+    path = str(tmp_path / "big.traj")
+    with TrajectoryWriter(path, delta=True) as writer:
+        with pytest.raises(ValueError):
+            writer.write(0, "pursuer", [[0.0], [1e6]])
+        with pytest.raises(ValueError):
+            writer.write(0, "pursuer", [[0.0], [np.nan]])
+        writer.write(0, "pursuer", [[0.0], [1e6]], delta=False)
+    np.testing.assert_array_equal(TrajectoryFile(path)[0, "pursuer"], [[0.0], [1e6]])
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.traj"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        TrajectoryFile(str(path))
+
+def test_failed_write_leaves_no_file(tmp_path):
+    path = tmp_path / "partial.traj"
+    with pytest.raises(RuntimeError):
+        with TrajectoryWriter(str(path)) as writer:
+            writer.write(0, "pursuer", np.zeros((10, 3)))
+            raise RuntimeError
+    assert os.listdir(tmp_path) == []
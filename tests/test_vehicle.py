@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
+
+import numpy as np
+import pytest
+
+from vehicle import Fleet
+
+def _euler_step(pos, vel, att, acc, dt, max_acc, max_vel, att_rate, limit_mode):
+    # The per-vehicle update the Day-4 loop in main.py used before Fleet
+    if limit_mode == "axis":
+        acc = np.clip(acc, -max_acc, max_acc)
+        vel = np.clip(vel + acc * dt, -max_vel, max_vel)
+    else:
+        norm = np.linalg.norm(acc)
+        acc = acc * (max_acc / norm) if norm > max_acc else acc
+        vel = vel + acc * dt
+        norm = np.linalg.norm(vel)
+        vel = vel * (max_vel / norm) if norm > max_vel else vel
+    return pos + vel * dt, vel, att + att_rate * dt, acc
+
+@pytest.mark.parametrize("limit_mode", ["axis", "norm"])
+def test_integrate_matches_per_vehicle_euler(limit_mode):
+    rng = np.random.default_rng(0)
+    M, dt = 6, 0.05
+    max_acc, max_vel = rng.uniform(0.5, 3.0, M), rng.uniform(0.5, 1.5, M)
+    fleet = Fleet(M, pos=rng.normal(0, 5, (M, 3)), max_acc=max_acc, max_vel=max_vel, limit_mode=limit_mode)
+    states = [(fleet.pos[m].copy(), fleet.vel[m].copy(), fleet.att[m].copy()) for m in range(M)]
+    speed_limited = 0
+    for _ in range(40):
+        acc, rate = rng.normal(1.0, 3.0, (M, 3)), rng.normal(0, 1, (M, 3))
+        applied = fleet.integrate(acc, dt, att_rate=rate)
+        for m in range(M):
+            *states[m], expected_acc = _euler_step(*states[m], acc[m], dt, max_acc[m], max_vel[m], rate[m],
+                                                   limit_mode)
+            np.testing.assert_allclose(applied[m], expected_acc, rtol=1e-12)
+        speed = np.abs(fleet.vel).max(axis=1) if limit_mode == "axis" else np.linalg.norm(fleet.vel, axis=1)
+        speed_limited += np.count_nonzero(np.isclose(speed, max_vel))
+    for field, values in zip(("pos", "vel", "att"), zip(*states)):
+        np.testing.assert_allclose(getattr(fleet, field), values, rtol=1e-12, atol=1e-12)
+    assert speed_limited > 0
+
+@pytest.mark.parametrize("limit_mode", ["axis", "norm"])
+def test_inactive_rows_are_frozen(limit_mode):
+    M = 5
+    # Every vehicle starts above its speed limit
+    fleet = Fleet(M, pos=np.arange(M * 3.0).reshape(M, 3), vel=[3.0, -3.0, 3.0], max_acc=1.0, max_vel=2.0,
+                  limit_mode=limit_mode)
+    fleet.alive[1] = False
+    fleet.captured[3] = True
+    before = {field: getattr(fleet, field).copy() for field in ("pos", "vel", "att")}
+
+    applied = fleet.integrate(np.full((M, 3), 10.0), 0.1, att_rate=np.ones((M, 3)))
+    frozen = np.array([False, True, False, True, False])
+    np.testing.assert_array_equal(fleet.active, ~frozen)
+    assert np.all(applied[frozen] == 0.0)
+    for field, values in before.items():
+        np.testing.assert_array_equal(getattr(fleet, field)[frozen], values[frozen])
+        assert np.all(getattr(fleet, field)[~frozen] != values[~frozen])
+    # Moving rows are held to the limits
+    if limit_mode == "axis":
+        assert np.all(applied[~frozen] == 1.0) and np.all(np.abs(fleet.vel[~frozen]) == 2.0)
+    else:
+        np.testing.assert_allclose(np.linalg.norm(applied[~frozen], axis=1), 1.0)
+        np.testing.assert_allclose(np.linalg.norm(fleet.vel[~frozen], axis=1), 2.0)